@@ -1,8 +1,11 @@
 from mongodbDriver import MongoDBManager
-from transformers import pipeline
-from bert_score import score as bert_score
-import evaluate
-from nltk.tokenize import word_tokenize
+from nltk.tokenize import sent_tokenize, word_tokenize
+
+from extractiveSelector import select_sentences
+from inferenceBackends import load_summarizer
+from summarizationEngine import BatchedSummarizer
+from summarizationMetrics import SummarizationMetrics
+from summaryCache import SummaryCache
 
 # from keybert import KeyBERT
 # from sentence_transformers import SentenceTransformer
@@ -11,41 +14,304 @@ from transformers import logging
 logging.set_verbosity_error()
 
 
+# Inference backend for BART: "pytorch" (fp32), "quantized" (int8) or "onnx"
+SUMMARIZER_BACKEND = "pytorch"
+SUMMARIZER_THREADS = None
+
 # Load summarization pipeline
-summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
+summarizer = load_summarizer(
+    "facebook/bart-large-cnn", backend=SUMMARIZER_BACKEND, num_threads=SUMMARIZER_THREADS
+)
+
+# Summarize posts from many documents per forward pass
+batched_summarizer = BatchedSummarizer(summarizer, batch_size=8)
+
+# Load BERTScore and ROUGE once and score documents in batches
+metrics_engine = SummarizationMetrics(model_type="roberta-large", lang="en")
+
+# Documents summarized and scored together
+DOCUMENT_BATCH_SIZE = 64
+
+# Map-reduce posts longer than the BART input in overlapping chunks, counted
+# with the BART tokenizer, instead of skipping them. When False, posts over
+# 1023 words are skipped. The 100- and 150-word thresholds that decide what is
+# summarized use NLTK word counts either way.
+CHUNKED_SUMMARIZATION = True
+CHUNK_OVERLAP_TOKENS = 64
+
+# Token budget of the extractive pre-selection. When set, the most central,
+# non-redundant sentences of each instance's posts are picked within the budget
+# and only the final BART pass runs on them. None disables the stage.
+EXTRACTIVE_TOKEN_BUDGET = None
+
+# Summaries keyed by a hash of their input texts, so unchanged posts and
+# instances are not summarized again. Entries are scoped to these settings.
+summary_cache = SummaryCache(
+    "summary_cache.sqlite",
+    config=f"{SUMMARIZER_BACKEND}|{CHUNKED_SUMMARIZATION}|{CHUNK_OVERLAP_TOKENS}|{EXTRACTIVE_TOKEN_BUDGET}",
+)
 
 # Initialize the SentenceTransformer model for KeyBERT
 # embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
 # kw_model = KeyBERT(embedding_model)
 
 
-def calculate_metrics(references, candidates):
+def score_and_store(collection, pending, document_keys):
+    """
+    Calculate metrics for a batch of summarized documents, write them back and cache them.
+
+    Args:
+        collection: MongoDB `instances` collection.
+        pending (list): (document_id, reference, concatenated_summary, final_summary,
+            extra_fields) tuples, where `reference` is the text the final summary is
+            scored against and `extra_fields` is a dict of additional fields to set.
+        document_keys (dict): Summary cache key of each document ID.
+    """
+    if not pending:
+        return
+
     try:
-        # Calculate BERTScore with FacebookAI/roberta-large
-        P, R, F1 = bert_score(
-            candidates, references, model_type="roberta-large", lang="en"#, verbose=True
+        results, timings = metrics_engine.score(
+            [reference for _, reference, _, _, _ in pending],
+            [summary for _, _, _, summary, _ in pending],
         )
-        bertscore_results = {
-            "precision": P.mean().item(),
-            "recall": R.mean().item(),
-            "f1": F1.mean().item()
-        }
-
-        # Calculate ROUGE using the new `evaluate` library
-        rouge_metric = evaluate.load("rouge")
-        rouge_scores = rouge_metric.compute(predictions=candidates, references=references)
-
-        # # Extract keywords using KeyBERT
-        # keywords = kw_model.extract_keywords(candidates[0], top_n=5)
-        # print("\nExtracted Keywords:")
-        # print(keywords)
-        return {
-            "bertscore": bertscore_results,
-            "rouge": rouge_scores
-        }
     except Exception as e:
         print(f"An error occurred while calculating metrics: {e}")
-        return None
+        if len(pending) > 1:
+            # Score one document at a time, so only the failing ones are marked ERROR
+            for document in pending:
+                score_and_store(collection, [document], document_keys)
+        else:
+            collection.update_one(
+                {"_id": pending[0][0]},
+                {"$set": {"summarization_status": "ERROR"}},
+            )
+        return
+
+    print(
+        f"Scored {len(pending)} documents: "
+        f"bertscore={timings['bertscore']:.2f}s, rouge={timings['rouge']:.2f}s"
+    )
+    for (document_id, _, concatenated_summary, final_summary, extra_fields), metrics in zip(
+        pending, results
+    ):
+        fields = {
+            "summarization_text": final_summary,
+            "summarization_bertscore": metrics["bertscore"],
+            "summarization_rouge": metrics["rouge"],
+            **extra_fields,
+        }
+        collection.update_one(
+            {"_id": document_id},
+            {"$set": {"summarization_status": "COMPLETED", **fields}},
+        )
+        if document_keys.get(document_id):
+            summary_cache.put_document(
+                document_keys[document_id], concatenated_summary, final_summary, fields
+            )
+
+
+def post_text(status):
+    if status["detected_language"] == "en":
+        return status["content"]
+    return status["libretranslate_translation"]
+
+
+def count_tokens(texts):
+    """
+    Token count of every text, plus a way to chunk the ones that need it.
+
+    Returns:
+        list: Token counts.
+        list: Tokenizer offsets per text in chunked mode, else None.
+    """
+    if CHUNKED_SUMMARIZATION:
+        offsets = batched_summarizer.tokenize(texts)
+        return [len(o) for o in offsets], offsets
+    return [len(word_tokenize(text)) for text in texts], None
+
+
+def extract_sentences(texts):
+    """
+    Extractive pre-selection of an instance's posts within EXTRACTIVE_TOKEN_BUDGET.
+
+    Returns:
+        str: Selected sentences, one per line, in post order.
+    """
+    sentences = [sentence for text in texts for sentence in sent_tokenize(text)]
+    token_counts, _ = count_tokens(sentences)
+    selected = select_sentences(sentences, token_counts, EXTRACTIVE_TOKEN_BUDGET)
+    return "\n".join(sentences[i] for i in selected)
+
+
+def summarize_documents(documents):
+    """
+    Summarize a batch of documents in batched phases.
+
+    Phase one summarizes every long post (and every chunk of an over-length
+    post) across all documents together; chunked posts are then reduced to a
+    single summary; the last phase produces the final summary of each document
+    from its concatenated intermediate summaries.
+
+    With EXTRACTIVE_TOKEN_BUDGET set, the extractive selection replaces the
+    concatenated intermediate summaries and only the final pass runs. Its
+    summaries are scored against the original posts rather than the selection.
+
+    Returns:
+        list: (document_id, reference, concatenated_summary, final_summary,
+            extra_fields) tuples.
+        list: IDs of documents that failed.
+    """
+    plans = []
+    extracted = {}
+    originals = {}
+    bart_calls_avoided = {}
+    failed = []
+    for document in documents:
+        try:
+            texts = [post_text(status) for status in document["original_content"][:10]]
+            token_counts, offsets = count_tokens(texts)
+            if CHUNKED_SUMMARIZATION:
+                word_counts = [len(word_tokenize(text)) for text in texts]
+            else:
+                word_counts = token_counts
+
+            # Each post becomes a list of pieces to summarize, or None to keep it
+            # (or its cached summary) as is
+            posts = []
+            for i, (text, token_count, word_count) in enumerate(zip(texts, token_counts, word_counts)):
+                if word_count <= 100:
+                    posts.append((text, None))
+                    continue
+
+                cached = None
+                if EXTRACTIVE_TOKEN_BUDGET is None:
+                    cached = summary_cache.get_post(text)
+
+                if cached is not None:
+                    posts.append((cached, None))
+                elif not CHUNKED_SUMMARIZATION and word_count > 1023:
+                    print("\n\n\n","*"*65)
+                    print(f"text higher than 1023 tokens, doc ID: {document['_id']}")
+                    print("*"*65, "\n\n\n")
+                    continue
+                elif CHUNKED_SUMMARIZATION and token_count > batched_summarizer.max_input_tokens:
+                    chunks = batched_summarizer.chunk(
+                        text, offsets[i], overlap_tokens=CHUNK_OVERLAP_TOKENS
+                    )
+                    posts.append((text, chunks))
+                else:
+                    posts.append((text, [(text, token_count)]))
+
+            if EXTRACTIVE_TOKEN_BUDGET is not None:
+                extracted[document["_id"]] = extract_sentences(texts)
+                originals[document["_id"]] = "\n".join(texts)
+                bart_calls_avoided[document["_id"]] = sum(
+                    len(chunks) + (len(chunks) > 1) for _, chunks in posts if chunks
+                )
+                posts = []
+            plans.append((document["_id"], posts))
+        except Exception as e:
+            print(f"An error occurred for document {document['_id']}: {e}")
+            failed.append(document["_id"])
+
+    # Step 1: Summarize every long post and chunk of the batch at once
+    pieces = [
+        piece for _, posts in plans for _, chunks in posts if chunks for piece in chunks
+    ]
+    piece_summaries = iter(
+        batched_summarizer.summarize(
+            [piece for piece, _ in pieces],
+            max_length=75,
+            min_length=25,
+            lengths=[count for _, count in pieces],
+        )
+    )
+
+    # Step 1b: Reduce the chunk summaries of each over-length post
+    mapped = []
+    for document_id, posts in plans:
+        summaries = []
+        for text, chunks in posts:
+            if chunks is None:
+                summaries.append((text, None, False))
+            elif len(chunks) == 1:
+                summaries.append((next(piece_summaries), text, False))
+            else:
+                group = [next(piece_summaries) for _ in chunks]
+                summaries.append((group, text, True))
+        mapped.append((document_id, summaries))
+
+    # Joined chunk summaries that are still too long are reduced again
+    to_reduce = [group for _, summaries in mapped for group, _, needs in summaries if needs]
+    reduced = iter(
+        batched_summarizer.reduce(
+            to_reduce, max_length=75, min_length=25, overlap_tokens=CHUNK_OVERLAP_TOKENS
+        )
+    )
+
+    # Step 2: Concatenate all intermediate summaries
+    concatenated_summaries = []
+    new_posts = []
+    for document_id, summaries in mapped:
+        if document_id in extracted:
+            concatenated_summaries.append((document_id, extracted[document_id]))
+            continue
+        intermediate_summaries = []
+        for summary, text, needs in summaries:
+            if needs:
+                summary = next(reduced)
+            if text is not None:
+                new_posts.append((text, summary))
+            intermediate_summaries.append(summary)
+        concatenated_summaries.append((document_id, "\n".join(intermediate_summaries)))
+
+    if new_posts:
+        summary_cache.put_posts(
+            [text for text, _ in new_posts], [summary for _, summary in new_posts]
+        )
+
+    # Step 3: Generate final summaries with default parameters
+    needs_final = [
+        len(word_tokenize(concatenated_summary)) > 150
+        for _, concatenated_summary in concatenated_summaries
+    ]
+    # Concatenations longer than the model input are chunked and reduced
+    # instead of being truncated by a single pass
+    final_summaries = iter(
+        batched_summarizer.reduce(
+            [
+                [concatenated_summary]
+                for (_, concatenated_summary), is_long in zip(concatenated_summaries, needs_final)
+                if is_long
+            ],
+            max_length=142,
+            min_length=56,
+            overlap_tokens=CHUNK_OVERLAP_TOKENS,
+        )
+    )
+
+    results = []
+    for (document_id, concatenated_summary), is_long in zip(concatenated_summaries, needs_final):
+        final_summary = next(final_summaries) if is_long else concatenated_summary
+        extra_fields = {}
+        if document_id in extracted:
+            extra_fields["summarization_extractive"] = {
+                "token_budget": EXTRACTIVE_TOKEN_BUDGET,
+                "bart_calls_avoided": bart_calls_avoided[document_id],
+            }
+        reference = originals.get(document_id, concatenated_summary)
+        results.append(
+            (document_id, reference, concatenated_summary, final_summary, extra_fields)
+        )
+
+    if extracted:
+        print(
+            f"Extractive pre-selection avoided {sum(bart_calls_avoided.values())} "
+            f"BART calls for {len(extracted)} documents"
+        )
+
+    return results, failed
 
 
 def main():
@@ -73,69 +339,60 @@ def main():
             )
         )
 
+        # Complete instances whose ordered inputs were already summarized
+        document_keys = {}
+        remaining = []
         for document in documents:
             try:
-                intermediate_summaries = []
-                for status in document["original_content"][:10]:
-                    # Perform summarization
-                    if status["detected_language"] == "en":
-                        text = status["content"]
-                    else:
-                        text = status["libretranslate_translation"]
-
-                    token_count = len(word_tokenize(text))
-                    if token_count > 1023:
-                        print("\n\n\n","*"*65)
-                        print(f"text higher than 1023 tokens, doc ID: {document['_id']}")
-                        print("*"*65, "\n\n\n")
-                        continue
-                    elif token_count > 100:
-                        summary = summarizer(
-                            text, max_length=75, min_length=25, do_sample=False
-                        )[0]["summary_text"]
-                    else:
-                        summary = text
-                    intermediate_summaries.append(summary)
-
-                # Step 2: Concatenate all intermediate summaries
-                concatenated_summary = "\n".join(intermediate_summaries)
-
-                # Step 3: Generate final summary with default parameters
-                if len(word_tokenize(concatenated_summary)) > 150:
-                    final_summary = summarizer(
-                        concatenated_summary, max_length=142, min_length=56, do_sample=False
-                    )[0]["summary_text"]
-                else:
-                    final_summary = concatenated_summary
-
-                # Step 4: Calculate BERTScore, ROUGE, and Keywords
-                reference_text = [concatenated_summary]  # Original reference
-                summary_text = [final_summary]  # Generated summary
-                metrics = calculate_metrics(reference_text, summary_text)
-
-                if metrics is None:
-                    raise Exception("Metrics calculation failed.")
-
-                # update document
-                collection.update_one(
-                    {"_id": document["_id"]},
-                    {
-                        "$set": {
-                            "summarization_status": "COMPLETED",
-                            "summarization_text": final_summary,
-                            "summarization_bertscore": metrics["bertscore"],
-                            "summarization_rouge": metrics["rouge"],
-                        }
-                    },
+                key = summary_cache.document_key(
+                    [post_text(status) for status in document["original_content"][:10]]
                 )
             except Exception as e:
                 print(f"An error occurred for document {document['_id']}: {e}")
+                key = None
+
+            cached = summary_cache.get_document(key) if key else None
+            if cached is not None:
+                _, _, fields = cached
                 collection.update_one(
                     {"_id": document["_id"]},
+                    {"$set": {"summarization_status": "COMPLETED", **fields}},
+                )
+                continue
+            document_keys[document["_id"]] = key
+            remaining.append(document)
+        print(f"{len(documents) - len(remaining)} documents completed from the summary cache")
+
+        for start in range(0, len(remaining), DOCUMENT_BATCH_SIZE):
+            batch = remaining[start : start + DOCUMENT_BATCH_SIZE]
+            try:
+                summaries, failed = summarize_documents(batch)
+            except Exception as e:
+                print(f"An error occurred while summarizing documents: {e}")
+                # Retry one document at a time, so only the failing ones are marked ERROR
+                summaries, failed = [], []
+                for document in batch:
+                    try:
+                        document_summaries, document_failed = summarize_documents([document])
+                    except Exception as e:
+                        print(f"An error occurred for document {document['_id']}: {e}")
+                        document_summaries, document_failed = [], [document["_id"]]
+                    summaries.extend(document_summaries)
+                    failed.extend(document_failed)
+
+            if failed:
+                collection.update_many(
+                    {"_id": {"$in": failed}},
                     {"$set": {"summarization_status": "ERROR"}},
                 )
+
+            # Step 4: Calculate BERTScore and ROUGE for the whole batch
+            score_and_store(collection, summaries, document_keys)
+
+        print("Summary cache:", summary_cache.stats())
     finally:
-        # Close the connection
+        # Close the connections
+        summary_cache.close()
         db_manager.close()
 
 
@@ -1,10 +1,22 @@
 from mongodbDriver import MongoDBManager
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 
-from sentence_transformers import SentenceTransformer
+from embeddingStorage import encode_vectors
+from inferenceBackends import load_sentence_encoder
 # from transformers import AutoTokenizer, AutoModel
 # import torch
 
-sbert_model = SentenceTransformer("all-MiniLM-L6-v2")
+# Inference backend for SBERT: "pytorch" (fp32), "quantized" (int8) or "onnx"
+EMBEDDING_BACKEND = "pytorch"
+EMBEDDING_THREADS = None
+# Embeddings are stored as packed BSON Binary of this dtype ("float32" or "float16")
+EMBEDDING_DTYPE = "float32"
+ENCODE_BATCH_SIZE = 64
+
+sbert_model = load_sentence_encoder(
+    "all-MiniLM-L6-v2", backend=EMBEDDING_BACKEND, num_threads=EMBEDDING_THREADS
+)
 # roberta_tokenizer = AutoTokenizer.from_pretrained("roberta-large")
 # roberta_model = AutoModel.from_pretrained("roberta-large")
 
@@ -20,6 +32,37 @@ sbert_model = SentenceTransformer("all-MiniLM-L6-v2")
 #     return sum_embeddings / sum_mask
 
 
+def encode_documents(documents):
+    """
+    Encode the summaries of many documents, falling back to one at a time.
+
+    Returns:
+        list: (document, embedding) pairs for the documents that were encoded.
+    """
+    try:
+        embeddings = sbert_model.encode(
+            [document["summarization_text"] for document in documents],
+            batch_size=ENCODE_BATCH_SIZE,
+            convert_to_numpy=True,
+        )
+        return list(zip(documents, embeddings))
+    except Exception as e:
+        print(f"An error occurred while encoding {len(documents)} documents: {e}")
+
+    # Retry one document at a time, so one bad summary does not drop the batch
+    encoded = []
+    for document in documents:
+        try:
+            embedding = sbert_model.encode(
+                [document["summarization_text"]], convert_to_numpy=True
+            )[0]
+            encoded.append((document, embedding))
+        except Exception as e:
+            print(f"An error occurred for document {document['_id']}: {e}")
+            continue
+    return encoded
+
+
 def main():
     db_manager = MongoDBManager(
         host="localhost",
@@ -45,33 +88,48 @@ def main():
             )
         )
 
+        pending = []
         for document in documents:
-            try:
-                summarization_text = document.get("summarization_text", "")
-                if not summarization_text:
-                    print(
-                        f"Skipping document {document['_id']} with empty summarization_text."
-                    )
-                    continue
-
-                # Generate SBERT embedding
-                sbert_embedding = sbert_model.encode(
-                    summarization_text, convert_to_tensor=True
-                ).tolist()
-
-                # Update document with embeddings
-                collection.update_one(
-                    {"_id": document["_id"]},
-                    {
-                        "$set": {
-                            "sbert_embedding": sbert_embedding,
-                        }
-                    },
+            if not document.get("summarization_text", ""):
+                print(
+                    f"Skipping document {document['_id']} with empty summarization_text."
                 )
-
-            except Exception as e:
-                print(f"An error occurred for document {document['_id']}: {e}")
                 continue
+            pending.append(document)
+
+        if not pending:
+            return
+
+        # Generate SBERT embeddings, sorted by length so batches pad evenly
+        pending.sort(key=lambda document: len(document["summarization_text"]))
+        encoded = encode_documents(pending)
+        if not encoded:
+            return
+
+        # Update all documents with their embeddings in one round trip
+        documents = [document for document, _ in encoded]
+        vectors = encode_vectors([embedding for _, embedding in encoded], EMBEDDING_DTYPE)
+        operations = [
+            UpdateOne(
+                {"_id": document["_id"]},
+                {
+                    "$set": {
+                        "sbert_embedding": embedding,
+                        "sbert_embedding_dtype": EMBEDDING_DTYPE,
+                    }
+                },
+            )
+            for document, embedding in zip(documents, vectors)
+        ]
+        try:
+            result = collection.bulk_write(operations, ordered=False)
+            print(f"Stored {result.modified_count} embeddings.")
+        except BulkWriteError as e:
+            # Unordered writes go on past a failure, so only the failed documents are lost
+            for error in e.details["writeErrors"]:
+                document_id = documents[error["index"]]["_id"]
+                print(f"An error occurred for document {document_id}: {error['errmsg']}")
+            print(f"Stored {e.details['nModified']} embeddings.")
 
     except Exception as e:
         print(f"An error occurred: {e}")
@@ -1,5 +1,6 @@
 from mongodbDriver import MongoDBManager
-import requests
+from libretranslateClient import LibreTranslateClient
+from translationCache import TranslationCache
 
 
 def main():
@@ -11,7 +12,12 @@ def main():
         database_name="mastodon-analysis",
     )
 
-    url = "http://localhost:5000/translate"
+    client = LibreTranslateClient(
+        url="http://localhost:5000/translate",
+        batch_size=16,
+        max_workers=4,
+        cache=TranslationCache("translation_cache.sqlite"),
+    )
 
     try:
         db_manager.connect()
@@ -25,6 +31,17 @@ def main():
             )
         )
 
+        # Collect every non-English post so the client can batch them by language
+        pending = []
+        for document in documents:
+            for status in document["original_content"]:
+                if status["detected_language"] != "en":
+                    # FIXME: change no->nb, zh-CN->zh
+                    pending.append((status["content"], status["detected_language"]))
+
+        translations = iter(client.translate_with_round_trip(pending))
+        print("Translation cache:", client.cache.stats())
+
         # Iterate through each document in the collection
         for document in documents:
             original_content = []
@@ -33,46 +50,18 @@ def main():
                 if status["detected_language"] == "en":
                     original_content.append(status)
                 else:
-                    libretranslate_translation = ""
-                    libretranslate_round_trip = ""
-                    data = {
-                        "q": status["content"],
-                        "source": status[
-                            "detected_language"
-                        ],  # FIXME: change no->nb, zh-CN->zh
-                        "target": "en",
-                    }
-
-                    response = requests.post(url, json=data)
-                    if response.status_code == 200:
-                        libretranslate_translation = response.json()["translatedText"]
-                        # FIXME: if libretranslate_translation between 10 200 token, continue
-                        round_trip_data = {
-                            "q": libretranslate_translation,
-                            "source": "en",
-                            "target": status["detected_language"],
-                        }
-                        round_trip_response = requests.post(url, json=round_trip_data)
-                        if round_trip_response.status_code == 200:
-                            libretranslate_round_trip = round_trip_response.json()[
-                                "translatedText"
-                            ]
-                        else:
-                            translate_status = "ERROR_ROUNDTRIP"
-                            libretranslate_round_trip = round_trip_response.text
-                            print("Error:", round_trip_response.text)
-                    else:
-                        translate_status = "ERROR_TRANSLATE"
-                        libretranslate_translation = response.text
-                        print("Error:", response.text)
+                    result = next(translations)
+                    # FIXME: if libretranslate_translation between 10 200 token, continue
+                    if result["status"] != "SUCCESS":
+                        translate_status = result["status"]
 
                     original_content.append(
                         {
                             "content": status["content"],
                             "language": status["language"],
                             "detected_language": status["detected_language"],
-                            "libretranslate_translation": libretranslate_translation,
-                            "libretranslate_round_trip": libretranslate_round_trip,
+                            "libretranslate_translation": result["translation"],
+                            "libretranslate_round_trip": result["round_trip"],
                         }
                     )
 
@@ -100,7 +89,9 @@ def main():
             )
 
     finally:
-        # Close the connection
+        # Close the connections
+        client.close()
+        client.cache.close()
         db_manager.close()
 
 
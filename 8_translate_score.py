@@ -1,15 +1,30 @@
 from mongodbDriver import MongoDBManager
 
-from nltk.translate.bleu_score import sentence_bleu, SmoothingFunction
-from nltk.translate.meteor_score import meteor_score, single_meteor_score
-from nltk.tokenize import word_tokenize
 from sentence_transformers import SentenceTransformer, util
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 import numpy as np
+import time
+import torch
 
+from lexicalScorer import LexicalScoringPool, score_pair
+from translationCache import text_hash
 
-# Initialize the LaBSE model
-model = SentenceTransformer("sentence-transformers/LaBSE")
+
+# LaBSE model, loaded by load_model() from main(). BLEU/METEOR worker
+# processes import this script, so nothing heavy is loaded at import time
+model = None
+
+# Score all pending posts at once instead of one post at a time
+BATCH_SCORING = True
+EMBEDDING_BATCH_SIZE = 64
+# BLEU/METEOR worker processes for batch scoring (None: one per CPU)
+LEXICAL_WORKERS = None
+LEXICAL_CHUNK_SIZE = 256
+
+# LaBSE embeddings keyed by text hash, shared by every batch in the run and
+# bounded as an LRU so long runs do not keep every embedding in memory
+EMBEDDING_CACHE_SIZE = 50000
+embedding_cache = OrderedDict()
 
 # import nltk
 
@@ -18,23 +33,16 @@ model = SentenceTransformer("sentence-transformers/LaBSE")
 # nltk.download('punkt_tab')
 
 
-def calculate_translation_scores(source_text, translation, back_translation):
-    # Tokenize the sentences (BLEU in nltk requires tokenized inputs)
-    source_tokens = word_tokenize(source_text)
-    back_translation_tokens = word_tokenize(back_translation)
-
-    # Use a smoothing function to handle brevity penalties in short sentences
-    smoothing_function = SmoothingFunction().method1
-
-    # Calculate BLEU score
-    bleu_score = sentence_bleu(
-        [source_tokens],  # Reference (source text)
-        back_translation_tokens,  # Hypothesis (back translation)
-        smoothing_function=smoothing_function,
-    )
+def load_model():
+    """Load the LaBSE model once."""
+    global model
+    if model is None:
+        model = SentenceTransformer("sentence-transformers/LaBSE")
+    return model
+
 
-    # Calculate METEOR score
-    meteor = single_meteor_score(source_tokens, back_translation_tokens)
+def calculate_translation_scores(source_text, translation, back_translation):
+    scores = score_pair(source_text, back_translation)
 
     # Encode the sentences to get their embeddings
     source_embedding = model.encode(source_text, convert_to_tensor=True)
@@ -48,12 +56,106 @@ def calculate_translation_scores(source_text, translation, back_translation):
     ).item()
 
     # Return all scores
-    return {
-        "bleu": round(bleu_score, 4),
-        "meteor": round(meteor, 4),
-        "LaBSE_CoSim": round(similarity, 4),
-        "LaBSE_CoSim_back": round(similarity2, 4),
-    }
+    scores.update(
+        {
+            "LaBSE_CoSim": round(similarity, 4),
+            "LaBSE_CoSim_back": round(similarity2, 4),
+        }
+    )
+    return scores
+
+
+def encode_texts(texts, batch_size=EMBEDDING_BATCH_SIZE):
+    """
+    Encode texts with LaBSE, skipping any whose embedding is already cached.
+
+    Unique texts are sorted by length before encoding so each batch pads to a
+    similar length. The cache keeps the EMBEDDING_CACHE_SIZE most recently
+    used embeddings.
+
+    Returns:
+        torch.Tensor: One embedding row per input text, in input order.
+    """
+    hashes = [text_hash(text) for text in texts]
+
+    found = {}
+    pending = {}
+    for text, h in zip(texts, hashes):
+        if h in found or h in pending:
+            continue
+        if h in embedding_cache:
+            embedding_cache.move_to_end(h)
+            found[h] = embedding_cache[h]
+        else:
+            pending[h] = text
+
+    if pending:
+        ordered = sorted(pending.items(), key=lambda item: len(item[1]))
+        embeddings = model.encode(
+            [text for _, text in ordered],
+            batch_size=batch_size,
+            convert_to_tensor=True,
+        )
+        for (h, _), embedding in zip(ordered, embeddings):
+            found[h] = embedding
+            embedding_cache[h] = embedding
+            if len(embedding_cache) > EMBEDDING_CACHE_SIZE:
+                embedding_cache.popitem(last=False)
+
+    return torch.stack([found[h] for h in hashes])
+
+
+def calculate_translation_scores_batch(triples, lexical_pool=None):
+    """
+    Score many (source, translation, back_translation) triples at once.
+
+    When `lexical_pool` is given, BLEU and METEOR are computed in its worker
+    processes while LaBSE encodes in this one.
+
+    Returns:
+        list: One score dict per triple, with the same keys as
+            `calculate_translation_scores`.
+        dict: Seconds spent in tokenization, BLEU, METEOR and embedding.
+            Lexical timings are summed over workers.
+    """
+    timings = {"tokenize": 0.0, "bleu": 0.0, "meteor": 0.0, "embedding": 0.0}
+    if not triples:
+        return [], timings
+
+    pairs = [(source, back) for source, _, back in triples]
+    if lexical_pool is not None:
+        lexical_futures = lexical_pool.submit(pairs)
+
+    start = time.perf_counter()
+    sources, translations, back_translations = map(list, zip(*triples))
+    embeddings = encode_texts(sources + translations + back_translations)
+    n = len(triples)
+    source_embeddings = embeddings[:n]
+    translation_embeddings = embeddings[n : 2 * n]
+    back_translation_embeddings = embeddings[2 * n :]
+
+    # Row-wise cosine similarity for every triple in one vectorized pass
+    similarities = util.pairwise_cos_sim(source_embeddings, translation_embeddings).tolist()
+    similarities2 = util.pairwise_cos_sim(
+        source_embeddings, back_translation_embeddings
+    ).tolist()
+    timings["embedding"] = time.perf_counter() - start
+
+    if lexical_pool is not None:
+        lexical_scores = LexicalScoringPool.collect(lexical_futures, timings)
+    else:
+        lexical_scores = [score_pair(source, back, timings) for source, back in pairs]
+
+    results = []
+    for scores, similarity, similarity2 in zip(lexical_scores, similarities, similarities2):
+        scores.update(
+            {
+                "LaBSE_CoSim": round(similarity, 4),
+                "LaBSE_CoSim_back": round(similarity2, 4),
+            }
+        )
+        results.append(scores)
+    return results, timings
 
 
 def main():
@@ -68,6 +170,14 @@ def main():
     # # Dictionary to store scores grouped by language
     # language_scores = defaultdict(lambda: defaultdict(list))
 
+    # Start the BLEU/METEOR workers before LaBSE and its torch threads are loaded
+    lexical_pool = None
+    if BATCH_SCORING:
+        lexical_pool = LexicalScoringPool(
+            max_workers=LEXICAL_WORKERS, chunk_size=LEXICAL_CHUNK_SIZE
+        )
+    load_model()
+
     try:
         db_manager.connect()
 
@@ -83,19 +193,43 @@ def main():
                 {"name", "original_content"},
             )
         )
+        if BATCH_SCORING:
+            # Collect every pending triple across documents and score them together
+            triples = [
+                (
+                    status["content"],
+                    status["libretranslate_translation"],
+                    status["libretranslate_round_trip"],
+                )
+                for document in documents
+                for status in document["original_content"]
+                if status["detected_language"] != "en"
+            ]
+            batch_scores, timings = calculate_translation_scores_batch(
+                triples, lexical_pool
+            )
+            print(
+                "Scoring time (s): "
+                + ", ".join(f"{key}={value:.2f}" for key, value in timings.items())
+            )
+            batch_scores = iter(batch_scores)
+
         # Iterate through each document in the collection
         counter = 0
         for document in documents:
             original_content = []
             for status in document["original_content"]:
                 if status["detected_language"] != "en":
-                    status.update(
-                        calculate_translation_scores(
-                            status["content"],
-                            status["libretranslate_translation"],
-                            status["libretranslate_round_trip"],
+                    if BATCH_SCORING:
+                        status.update(next(batch_scores))
+                    else:
+                        status.update(
+                            calculate_translation_scores(
+                                status["content"],
+                                status["libretranslate_translation"],
+                                status["libretranslate_round_trip"],
+                            )
                         )
-                    )
 
                 original_content.append(status)
 
@@ -111,7 +245,9 @@ def main():
             print(counter)
 
     finally:
-        # Close the connection
+        # Close the connection and the lexical workers
+        if lexical_pool is not None:
+            lexical_pool.close()
         db_manager.close()
 
     # # Calculate and display statistics using NumPy
@@ -0,0 +1,290 @@
+import json
+import multiprocessing as mp
+import os
+import platform
+import random
+import resource
+import subprocess
+import time
+
+import igraph as ig
+import leidenalg as la
+import networkx as nx
+import numpy as np
+
+from utils import (
+    load_unweighted_graph,
+    load_weighted_graph,
+    load_igraph,
+    detect_louvain_communities,
+    detect_leiden_communities,
+    detect_label_propagation_communities,
+    girvan_newman_best_partition,
+    partition_statistics,
+    calculate_modularity,
+    calculate_modularity_density,
+    calculate_conductance,
+    calculate_partition_similarity,
+)
+from centrality_engine import compute_centralities, compute_centralities_networkx
+
+GRAPH_SIZES = [1_000, 10_000, 50_000, 100_000]
+GRAPH_FAMILIES = ["planted_partition", "lfr", "power_law"]
+AVERAGE_DEGREE = 10
+COMMUNITY_SIZE = 100  # Planted partition blocks
+MIXING = 0.1  # Fraction of each node's edges leaving its community
+SEED = 100
+
+# networkx paths (exact betweenness/closeness, label propagation) are skipped above this size
+NETWORKX_LIMIT = 10_000
+# Sampled Girvan-Newman is skipped above this size
+GIRVAN_NEWMAN_LIMIT = 1_000
+GIRVAN_NEWMAN_SPLITS = 50
+# Pivot sampling of betweenness and closeness above NETWORKX_LIMIT
+APPROXIMATE = {"k": 256, "seed": SEED}
+# Seconds before a single measurement is abandoned
+MEASURE_TIMEOUT = 3600
+
+GRAPH_DIR = "benchmark_graphs"
+RESULTS_DIR = "benchmark_results"
+# Earlier results file to compare against, e.g. "benchmark_results/<commit>.json"
+BASELINE_FILE = None
+# Slowdown (current / baseline seconds) reported as a regression
+REGRESSION_RATIO = 1.25
+
+
+def _unique_edges(edges):
+    edges = np.sort(edges, axis=1)
+    edges = edges[edges[:, 0] != edges[:, 1]]
+    return np.unique(edges, axis=0)
+
+
+def planted_partition(n, rng):
+    """Equal blocks of COMMUNITY_SIZE nodes, a MIXING share of edges between blocks."""
+    labels = np.arange(n) // COMMUNITY_SIZE
+    m = n * AVERAGE_DEGREE // 2
+    m_out = int(m * MIXING)
+
+    # Internal edges: a random block, then two random members
+    block = rng.integers(0, labels[-1] + 1, size=m - m_out)
+    start = block * COMMUNITY_SIZE
+    size = np.minimum(COMMUNITY_SIZE, n - start)
+    internal = start[:, None] + (rng.random((len(block), 2)) * size[:, None]).astype(np.int64)
+
+    # External edges: random pairs in different blocks
+    external = rng.integers(0, n, size=(m_out, 2))
+    external = external[labels[external[:, 0]] != labels[external[:, 1]]]
+    return _unique_edges(np.vstack([internal, external])), labels
+
+
+def _power_law(rng, size, exponent, minimum, maximum):
+    values = minimum * (1 - rng.random(size)) ** (-1 / (exponent - 1))
+    return np.minimum(values, maximum)
+
+
+def lfr_style(n, rng, degree_exponent=2.5, community_exponent=1.5):
+    """
+    LFR-style graph: power-law degrees and community sizes, with each node
+    sending a MIXING share of its edge stubs outside its community.
+    """
+    degrees = _power_law(rng, n, degree_exponent, 1, np.sqrt(n) * AVERAGE_DEGREE)
+    degrees = np.maximum(np.rint(degrees * AVERAGE_DEGREE / degrees.mean()), 1).astype(np.int64)
+
+    sizes = []
+    while sum(sizes) < n:
+        sizes.append(int(_power_law(rng, 1, community_exponent, 20, max(n // 10, 20))[0]))
+    sizes[-1] -= sum(sizes) - n
+    labels = rng.permutation(np.repeat(np.arange(len(sizes)), sizes))
+
+    external_stubs = rng.binomial(degrees, MIXING)
+    internal_stubs = degrees - external_stubs
+
+    # Pair internal stubs inside each community: shuffle, group by community,
+    # and join neighbours that landed in the same community
+    stubs = np.repeat(np.arange(n), internal_stubs)
+    stubs = stubs[np.lexsort((rng.random(len(stubs)), labels[stubs]))]
+    pairs = stubs[: len(stubs) // 2 * 2].reshape(-1, 2)
+    internal = pairs[labels[pairs[:, 0]] == labels[pairs[:, 1]]]
+
+    stubs = rng.permutation(np.repeat(np.arange(n), external_stubs))
+    external = stubs[: len(stubs) // 2 * 2].reshape(-1, 2)
+    return _unique_edges(np.vstack([internal, external])), labels
+
+
+def power_law(n, rng):
+    """Barabasi-Albert preferential attachment, without planted communities."""
+    random.seed(int(rng.integers(2**31)))  # igraph draws from the random module
+    g = ig.Graph.Barabasi(n, AVERAGE_DEGREE // 2)
+    return _unique_edges(np.array(g.get_edgelist(), dtype=np.int64)), None
+
+
+GENERATORS = {"planted_partition": planted_partition, "lfr": lfr_style, "power_law": power_law}
+
+
+def write_edgelists(family, n, edges, rng):
+    """Write the graph in the unweighted and weighted formats the loaders read."""
+    os.makedirs(GRAPH_DIR, exist_ok=True)
+    unweighted_path = os.path.join(GRAPH_DIR, f"{family}_{n}.txt")
+    weighted_path = os.path.join(GRAPH_DIR, f"{family}_{n}_weighted.txt")
+    # Similarity-like weights, including the negative ones the loaders clamp
+    weights = rng.uniform(-0.1, 1.0, size=len(edges))
+    with open(unweighted_path, "w") as unweighted, open(weighted_path, "w") as weighted:
+        for (u, v), w in zip(edges.tolist(), weights.tolist()):
+            unweighted.write(f"n{u} n{v}\n")
+            weighted.write(f"n{u} n{v} {w:.4f}\n")
+    return unweighted_path, weighted_path
+
+
+def _measure_child(conn, func):
+    start_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    try:
+        func()
+        error = None
+    except Exception as e:
+        error = repr(e)
+    seconds = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux
+    conn.send((seconds, (peak_rss - start_rss) / 1024, error))
+
+
+def measure(func):
+    """
+    Run func in a forked process and return its wall time, the growth of the
+    peak resident memory (MB, including memory allocated by C extensions)
+    and any error.
+    """
+    context = mp.get_context("fork")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_measure_child, args=(sender, func))
+    process.start()
+    if receiver.poll(MEASURE_TIMEOUT):
+        seconds, peak_mb, error = receiver.recv()
+    else:
+        process.terminate()
+        seconds, peak_mb, error = None, None, f"timeout after {MEASURE_TIMEOUT}s"
+    process.join()
+    return {"seconds": seconds, "peak_memory_mb": peak_mb, "error": error}
+
+
+def benchmark_graph(family, n):
+    # Seeded per graph, so each graph is the same whatever else is benchmarked
+    rng = np.random.default_rng([SEED, GRAPH_FAMILIES.index(family), n])
+    edges, labels = GENERATORS[family](n, rng)
+    unweighted_path, weighted_path = write_edgelists(family, n, edges, rng)
+    print(f"\n===== {family}, {n} nodes, {len(edges)} edges =====")
+    print(f"{'function':>40} {'seconds':>9} {'peak MB':>9}")
+
+    # Graphs and a reference partition shared (copy-on-write) by the measurements
+    networkx_graph = load_unweighted_graph(unweighted_path)
+    graph = load_igraph(unweighted_path)
+    weighted_graph = load_igraph(weighted_path, is_weighted=True)
+    leiden = detect_leiden_communities(graph)
+    if labels is not None:
+        partition = {f"n{i}": int(label) for i, label in enumerate(labels.tolist()) if f"n{i}" in leiden}
+    else:
+        partition = leiden
+    statistics = partition_statistics(graph, partition)
+
+    measurements = {
+        "load_unweighted_graph": lambda: load_unweighted_graph(unweighted_path),
+        "load_weighted_graph": lambda: load_weighted_graph(weighted_path),
+        "load_igraph": lambda: load_igraph(unweighted_path),
+        "load_igraph (weighted)": lambda: load_igraph(weighted_path, is_weighted=True),
+        "compute_centralities": lambda: compute_centralities(
+            graph, approximate=APPROXIMATE if n > NETWORKX_LIMIT else None
+        ),
+        "detect_louvain_communities (igraph)": lambda: detect_louvain_communities(graph),
+        "detect_louvain_communities (networkx)": lambda: detect_louvain_communities(networkx_graph),
+        "detect_leiden_communities": lambda: detect_leiden_communities(graph),
+        "detect_leiden_communities (weighted)": lambda: detect_leiden_communities(
+            weighted_graph, is_weighted=True
+        ),
+        "partition_statistics": lambda: partition_statistics(graph, partition),
+        "calculate_modularity": lambda: calculate_modularity(graph, partition, statistics),
+        "calculate_modularity_density": lambda: calculate_modularity_density(graph, partition, statistics),
+        "calculate_conductance": lambda: calculate_conductance(graph, partition, statistics),
+        "calculate_partition_similarity": lambda: calculate_partition_similarity(partition, leiden),
+    }
+    if n <= NETWORKX_LIMIT:
+        measurements["compute_centralities_networkx"] = lambda: compute_centralities_networkx(networkx_graph)
+        measurements["detect_label_propagation_communities"] = lambda: (
+            detect_label_propagation_communities(networkx_graph)
+        )
+    if n <= GIRVAN_NEWMAN_LIMIT:
+        measurements["girvan_newman_best_partition"] = lambda: girvan_newman_best_partition(
+            graph, max_splits=GIRVAN_NEWMAN_SPLITS, sample_size=100, seed=SEED
+        )
+
+    results = []
+    for function, func in measurements.items():
+        result = {"family": family, "nodes": n, "edges": len(edges), "function": function, **measure(func)}
+        results.append(result)
+        if result["error"]:
+            print(f"{function:>40} {'failed':>9} {'':>9} {result['error']}")
+        else:
+            print(f"{function:>40} {result['seconds']:>9.3f} {result['peak_memory_mb']:>9.1f}")
+
+    if labels is not None:
+        ari, nmi = calculate_partition_similarity(partition, leiden)
+        print(f"Leiden vs planted communities: ARI={ari:.3f}, NMI={nmi:.3f}")
+    return results
+
+
+def _metadata():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = "unknown"
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "networkx": nx.__version__,
+        "igraph": ig.__version__,
+        "leidenalg": la.version,
+        "numpy": np.__version__,
+        "seed": SEED,
+    }
+
+
+def compare(baseline, results):
+    """Print the measurements that got slower than the baseline by REGRESSION_RATIO."""
+    previous = {
+        (r["family"], r["nodes"], r["function"]): r["seconds"] for r in baseline["results"] if r["seconds"]
+    }
+    print(f"\n===== Compared with {baseline['metadata']['commit']} =====")
+    regressions = 0
+    for r in results:
+        before = previous.get((r["family"], r["nodes"], r["function"]))
+        if before and r["seconds"] and r["seconds"] / before > REGRESSION_RATIO:
+            regressions += 1
+            print(f"{r['family']} {r['nodes']} {r['function']}: {before:.3f}s -> {r['seconds']:.3f}s")
+    print(f"{regressions} regressions")
+
+
+def main():
+    results = []
+    for family in GRAPH_FAMILIES:
+        for n in GRAPH_SIZES:
+            results.extend(benchmark_graph(family, n))
+
+    report = {"metadata": _metadata(), "results": results}
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output_file = os.path.join(RESULTS_DIR, f"{report['metadata']['commit']}.json")
+    with open(output_file, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"\nResults written to: {output_file}")
+
+    if BASELINE_FILE:
+        with open(BASELINE_FILE) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import time
+
+import networkx as nx
+import numpy as np
+
+from centrality_engine import (
+    build_adjacency,
+    betweenness_closeness,
+    eigenvector_csr,
+    hits_csr,
+    pagerank_csr,
+)
+
+GRAPH_SIZES = [10_000, 50_000, 100_000]
+EDGES_PER_NODE = 5
+# Exact networkx betweenness/closeness is O(nm); skip it above this size
+NETWORKX_PATH_LIMIT = 10_000
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def max_difference(reference, nodes, values):
+    return max(abs(reference[node] - value) for node, value in zip(nodes, values))
+
+
+def benchmark(n):
+    graph = nx.barabasi_albert_graph(n, EDGES_PER_NODE, seed=100)
+    print(f"\n===== {n} nodes, {graph.number_of_edges()} edges =====")
+    print(f"{'measure':>12} {'networkx s':>11} {'engine s':>9} {'max diff':>10}")
+
+    (nodes, A), build_time = timed(build_adjacency, graph)
+    print(f"{'CSR build':>12} {'':>11} {build_time:>9.2f}")
+
+    measures = {
+        "Eigenvector": (
+            lambda: nx.eigenvector_centrality(graph, max_iter=1000),
+            lambda: eigenvector_csr(A),
+        ),
+        "PageRank": (lambda: nx.pagerank(graph), lambda: pagerank_csr(A)),
+        "HITS Hubs": (
+            lambda: nx.hits(graph, max_iter=1000)[0],
+            lambda: hits_csr(A)[0],
+        ),
+    }
+    for measure, (networkx_func, engine_func) in measures.items():
+        reference, networkx_time = timed(networkx_func)
+        values, engine_time = timed(engine_func)
+        print(
+            f"{measure:>12} {networkx_time:>11.2f} {engine_time:>9.2f} "
+            f"{max_difference(reference, nodes, values):>10.2e}"
+        )
+
+    (betweenness, closeness), engine_time = timed(betweenness_closeness, graph, nodes)
+    if n <= NETWORKX_PATH_LIMIT:
+        reference_betweenness, betweenness_time = timed(nx.betweenness_centrality, graph)
+        reference_closeness, closeness_time = timed(nx.closeness_centrality, graph)
+        networkx_time = f"{betweenness_time + closeness_time:>11.2f}"
+        difference = max(
+            max_difference(reference_betweenness, nodes, betweenness),
+            max_difference(reference_closeness, nodes, closeness),
+        )
+        difference = f"{difference:>10.2e}"
+    else:
+        networkx_time = f"{'skipped':>11}"
+        difference = f"{'':>10}"
+    print(f"{'Betw.+Clos.':>12} {networkx_time} {engine_time:>9.2f} {difference}")
+
+
+def main():
+    for n in GRAPH_SIZES:
+        benchmark(n)
+
+
+if __name__ == "__main__":
+    main()
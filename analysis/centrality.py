@@ -5,37 +5,83 @@ import pandas as pd
 from collections import Counter
 import seaborn as sns
 
-from utils import load_unweighted_graph
+from utils import load_igraph, to_networkx
+from result_store import ResultStore
+from preprocessing import describe_preprocessing, expand_scores, preprocess_graph
+from centrality_engine import (
+    betweenness_closeness,
+    build_adjacency,
+    compute_centralities,
+    compute_centralities_networkx,
+    top_k_stability,
+)
+
+# Pruning applied before computing centralities, as keyword arguments of
+# preprocess_graph. Only {"largest_component": True} is allowed: dropping the
+# other components scales each score by a constant and keeps the rankings,
+# while k-cores and folded whiskers take degree and paths away from the nodes
+# they hang off. Dropped nodes are reported with a score of 0.
+PREPROCESSING = None
 
-def compute_centralities_and_plot_heatmap(graph):
+# Smallest share of the exact top 10 the approximate betweenness and closeness
+# must find when check_stability is set
+MIN_TOP_K_OVERLAP = 0.8
+
+def compute_centralities_and_plot_heatmap(
+    graph, engine="sparse", approximate=None, check_stability=False, store=None, mapping=None
+):
     """
     Compute centrality measures for the given graph, extract the top 10 nodes for each measure,
     and generate a heatmap.
     
     Parameters:
-        graph (networkx.Graph): Input network graph.
+        graph (networkx.Graph or igraph.Graph): Input network graph. The
+            networkx engine converts igraph input first.
+        engine (str): "sparse" for the shared-CSR centrality engine, "networkx" for
+            the per-measure networkx functions.
+        approximate (dict or None): Pivot sampling settings for betweenness and
+            closeness in the sparse engine, e.g. {"k": 500} or {"epsilon": 0.01, "delta": 0.1}.
+        check_stability (bool): Also compute exact betweenness and closeness, and
+            raise ValueError when the approximate top 10 shares less than
+            MIN_TOP_K_OVERLAP of their top 10 nodes.
+        store (ResultStore or None): Reuse centralities cached for this graph
+            and settings, and cache newly computed ones.
+        mapping (dict or None): Nodes removed by `preprocess_graph`, which are
+            given a score of 0 in every measure.
     
     Returns:
         pd.DataFrame: DataFrame containing top 10 nodes for each centrality measure.
     """
-    # Compute centrality measures
-    degree_centrality = nx.degree_centrality(graph)
-    betweenness_centrality = nx.betweenness_centrality(graph)
-    closeness_centrality = nx.closeness_centrality(graph)
-    eigenvector_centrality = nx.eigenvector_centrality(graph, max_iter=1000)
-    pagerank_centrality = nx.pagerank(graph)
-    hits_hubs, hits_authorities = nx.hits(graph, max_iter=1000)
-
-    # Store centrality measures in a dictionary
-    centralities = {
-        "Degree": degree_centrality,
-        "Betweenness": betweenness_centrality,
-        "Closeness": closeness_centrality,
-        "Eigenvector": eigenvector_centrality,
-        "PageRank": pagerank_centrality,
-        "HITS Hubs": hits_hubs,
-        "HITS Authorities": hits_authorities
-    }
+    # Compute centrality measures, or load them from the store
+    params = {"engine": engine, "approximate": approximate}
+    centralities = store.get_centralities(store.fingerprint(graph), params) if store else None
+    if centralities is not None:
+        print("Using cached centralities")
+    else:
+        if engine == "sparse":
+            centralities = compute_centralities(graph, approximate=approximate)
+        else:
+            centralities = compute_centralities_networkx(to_networkx(graph))
+
+        # Top-10 stability of the approximate measures against exact results,
+        # checked before anything is cached
+        if approximate is not None and check_stability:
+            nodes, _ = build_adjacency(graph)
+            exact_betweenness, exact_closeness = betweenness_closeness(graph, nodes)
+            for measure, exact in (("Betweenness", exact_betweenness), ("Closeness", exact_closeness)):
+                stability = top_k_stability(dict(zip(nodes, exact)), centralities[measure], k=10)
+                print(f"{measure} top-10 stability: {stability}")
+                if stability["overlap"] < MIN_TOP_K_OVERLAP:
+                    raise ValueError(
+                        f"Approximate {measure.lower()} found {stability['overlap']:.0%} of the exact "
+                        f"top 10 (missing {stability['missing']}); sample more pivots"
+                    )
+
+        if store:
+            store.put_centralities(store.fingerprint(graph), centralities, params)
+
+    if mapping:
+        centralities = {measure: expand_scores(values, mapping) for measure, values in centralities.items()}
 
     # Extract top 10 nodes for each centrality measure
     top_nodes = {
@@ -66,10 +112,19 @@ def compute_centralities_and_plot_heatmap(graph):
 
 
 
-unweighted_graph = load_unweighted_graph(
+unweighted_graph = load_igraph(
     "edgelist_content.txt"
 )
+pruned_mapping = {}
+if PREPROCESSING:
+    if set(PREPROCESSING) - {"largest_component"}:
+        raise ValueError("Centralities only support largest_component preprocessing")
+    pruned_graph, pruned_mapping = preprocess_graph(unweighted_graph, **PREPROCESSING)
+    print(describe_preprocessing(unweighted_graph, pruned_graph, pruned_mapping))
+    unweighted_graph = pruned_graph
 
-df_centrality = compute_centralities_and_plot_heatmap(unweighted_graph)
+df_centrality = compute_centralities_and_plot_heatmap(
+    unweighted_graph, store=ResultStore("results"), mapping=pruned_mapping
+)
 
 print(df_centrality)
\ No newline at end of file
@@ -0,0 +1,380 @@
+import networkx as nx
+import numpy as np
+import scipy.sparse as sp
+from concurrent.futures import ProcessPoolExecutor
+import math
+import os
+import random
+
+try:
+    import igraph as ig
+except ImportError:
+    ig = None
+
+
+def _is_igraph(graph):
+    return ig is not None and isinstance(graph, ig.Graph)
+
+
+def _as_networkx(graph):
+    """networkx view of the graph, built only for the networkx-based paths."""
+    if _is_igraph(graph):
+        from utils import to_networkx
+
+        return to_networkx(graph)
+    return graph
+
+
+# Build one CSR adjacency matrix shared by every centrality measure
+def build_adjacency(graph, weight=None):
+    """
+    Build a scipy CSR adjacency matrix of the graph.
+
+    Parameters:
+        graph (networkx.Graph or igraph.Graph): Input network graph. igraph
+            vertices are named by their "name" attribute.
+        weight (str or None): Edge attribute used as weight, or None for 1.
+
+    Returns:
+        list: Nodes in matrix row order.
+        scipy.sparse.csr_matrix: Adjacency matrix.
+    """
+    if _is_igraph(graph):
+        n = graph.vcount()
+        edges = np.array(graph.get_edgelist(), dtype=np.int64).reshape(-1, 2)
+        if weight is not None and weight in graph.es.attributes():
+            values = np.array(graph.es[weight], dtype=np.float64)
+        else:
+            values = np.ones(len(edges))
+        rows = np.concatenate([edges[:, 0], edges[:, 1]])
+        cols = np.concatenate([edges[:, 1], edges[:, 0]])
+        A = sp.csr_matrix((np.concatenate([values, values]), (rows, cols)), shape=(n, n))
+        return graph.vs["name"], A
+
+    nodes = list(graph.nodes())
+    A = nx.to_scipy_sparse_array(graph, nodelist=nodes, weight=weight, format="csr")
+    return nodes, sp.csr_matrix(A, dtype=np.float64)
+
+
+def pagerank_csr(A, alpha=0.85, max_iter=100, tol=1.0e-6):
+    """
+    PageRank by power iteration, matching networkx.pagerank defaults.
+
+    Dangling nodes redistribute their rank uniformly.
+    """
+    n = A.shape[0]
+    out_degree = np.asarray(A.sum(axis=1)).ravel()
+    dangling = out_degree == 0
+    inverse_degree = np.divide(1.0, out_degree, out=np.zeros(n), where=~dangling)
+    # Row-stochastic transition matrix, transposed for x <- P^T x
+    P_T = (sp.diags(inverse_degree) @ A).T.tocsr()
+
+    x = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        x_last = x
+        x = alpha * (P_T @ x_last + x_last[dangling].sum() / n) + (1 - alpha) / n
+        if np.abs(x - x_last).sum() < n * tol:
+            return x
+    raise nx.PowerIterationFailedConvergence(max_iter)
+
+
+def eigenvector_csr(A, max_iter=1000, tol=1.0e-6):
+    """Eigenvector centrality by power iteration on (A + I), matching networkx."""
+    n = A.shape[0]
+    x = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        x_last = x
+        x = x_last + A.T @ x_last
+        norm = np.linalg.norm(x) or 1
+        x = x / norm
+        if np.abs(x - x_last).sum() < n * tol:
+            return x
+    raise nx.PowerIterationFailedConvergence(max_iter)
+
+
+def hits_csr(A, max_iter=1000, tol=1.0e-8):
+    """HITS hubs and authorities by power iteration, each normalized to sum to 1."""
+    n = A.shape[0]
+    A_T = A.T.tocsr()
+    h = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        h_last = h
+        a = A_T @ h_last
+        h = A @ a
+        h = h / (h.max() or 1)
+        if np.abs(h - h_last).sum() < tol:
+            break
+    else:
+        raise nx.PowerIterationFailedConvergence(max_iter)
+
+    a = A_T @ h
+    return h / (h.sum() or 1), a / (a.sum() or 1)
+
+
+def _betweenness_chunk(graph, sources):
+    return nx.betweenness_centrality_subset(
+        graph, sources, list(graph.nodes()), normalized=False
+    )
+
+
+def _closeness_chunk(graph, nodes):
+    return {node: nx.closeness_centrality(graph, u=node) for node in nodes}
+
+
+def _parallel_map(func, graph, nodes, processes=None):
+    processes = processes or os.cpu_count()
+    chunks = [nodes[i::processes] for i in range(processes)]
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(executor.map(func, [graph] * len(chunks), chunks))
+
+
+def betweenness_closeness(graph, nodes, backend="igraph", processes=None):
+    """
+    Normalized betweenness and closeness centrality, as networkx computes them.
+
+    Parameters:
+        graph (networkx.Graph or igraph.Graph): Input network graph.
+        nodes (list): Nodes in the order of the returned arrays.
+        backend (str): "igraph", or "parallel" for networkx over a process pool.
+        processes (int): Worker processes for the parallel backend.
+
+    Returns:
+        np.ndarray: Betweenness centrality.
+        np.ndarray: Closeness centrality.
+    """
+    n = len(nodes)
+    if backend == "igraph" and ig is not None:
+        if _is_igraph(graph):
+            g = graph
+            index = {name: i for i, name in enumerate(graph.vs["name"])}
+            order = np.array([index[node] for node in nodes], dtype=np.int64)
+        else:
+            index = {node: i for i, node in enumerate(nodes)}
+            g = ig.Graph(n=n, edges=[(index[u], index[v]) for u, v in graph.edges()])
+            order = np.arange(n)
+
+        betweenness = np.array(g.betweenness(directed=False), dtype=float)[order]
+
+        # networkx scales closeness by the reachable fraction of the graph (wf_improved)
+        closeness = np.nan_to_num(np.array(g.closeness(normalized=True), dtype=float))
+        components = g.connected_components()
+        reachable = np.array(components.sizes())[components.membership] - 1
+        if n > 1:
+            closeness = closeness * reachable / (n - 1)
+        closeness = closeness[order]
+    else:
+        graph = _as_networkx(graph)
+        # Betweenness sums over disjoint source sets
+        betweenness_dict = {}
+        for chunk in _parallel_map(_betweenness_chunk, graph, nodes, processes):
+            for node, value in chunk.items():
+                betweenness_dict[node] = betweenness_dict.get(node, 0.0) + value
+        betweenness = np.array([betweenness_dict[node] for node in nodes])
+
+        closeness_dict = {}
+        for chunk in _parallel_map(_closeness_chunk, graph, nodes, processes):
+            closeness_dict.update(chunk)
+        closeness = np.array([closeness_dict[node] for node in nodes])
+
+    if n > 2:
+        betweenness = betweenness * 2 / ((n - 1) * (n - 2))
+    return betweenness, closeness
+
+
+def pivots_for_error(n, epsilon, delta=0.1):
+    """
+    Number of sampled pivots so every normalized score is within epsilon of the
+    exact one with probability at least 1 - delta (Hoeffding and a union bound).
+
+    One pivot's estimate, its (halved, undirected) dependency scaled up by n and
+    normalized, lies in [0, n / (n - 1)], the bound reached at a star's centre.
+    """
+    value_range = n / (n - 1) if n > 1 else 1.0
+    return min(n, math.ceil(value_range ** 2 * math.log(2 * n / delta) / (2 * epsilon ** 2)))
+
+
+def _sample_pivots(nodes, k, epsilon, delta, seed):
+    n = len(nodes)
+    if k is None:
+        k = pivots_for_error(n, epsilon, delta) if epsilon else n
+    return random.Random(seed).sample(nodes, min(k, n))
+
+
+def _distance_sums_chunk(graph, pivots):
+    sums = {}
+    for pivot in pivots:
+        for node, distance in nx.single_source_shortest_path_length(graph, pivot).items():
+            sums[node] = sums.get(node, 0) + distance
+    return sums
+
+
+def approximate_betweenness(graph, nodes, k=None, epsilon=None, delta=0.1, seed=None, processes=None):
+    """
+    Betweenness centrality estimated from k sampled source pivots.
+
+    Parameters:
+        graph (networkx.Graph): Input network graph.
+        nodes (list): Nodes in the order of the returned array.
+        k (int): Number of pivots. Derived from epsilon and delta when None.
+        epsilon (float): Target absolute error of the normalized scores.
+        delta (float): Allowed probability of missing the epsilon target.
+        seed (int): Seed of the pivot sample.
+        processes (int): Worker processes the pivots are spread over.
+
+    Returns:
+        np.ndarray: Normalized betweenness, on the same scale as the exact one.
+    """
+    n = len(nodes)
+    pivots = _sample_pivots(nodes, k, epsilon, delta, seed)
+
+    betweenness_dict = {}
+    for chunk in _parallel_map(_betweenness_chunk, graph, pivots, processes):
+        for node, value in chunk.items():
+            betweenness_dict[node] = betweenness_dict.get(node, 0.0) + value
+    betweenness = np.array([betweenness_dict.get(node, 0.0) for node in nodes])
+
+    # Scale the sampled sources up to all n sources
+    betweenness = betweenness * n / len(pivots)
+    if n > 2:
+        betweenness = betweenness * 2 / ((n - 1) * (n - 2))
+    return betweenness
+
+
+def approximate_closeness(graph, nodes, k=None, epsilon=None, delta=0.1, seed=None, processes=None):
+    """
+    Closeness centrality estimated from k sampled BFS pivots (Eppstein-Wang).
+
+    Each node's total distance to its component is extrapolated from its
+    distances to the pivots in that component. Components without a pivot
+    are computed exactly.
+
+    Returns:
+        np.ndarray: Closeness, on the same scale as networkx.closeness_centrality.
+    """
+    n = len(nodes)
+    pivots = _sample_pivots(nodes, k, epsilon, delta, seed)
+
+    distance_sums = {}
+    for chunk in _parallel_map(_distance_sums_chunk, graph, pivots, processes):
+        for node, value in chunk.items():
+            distance_sums[node] = distance_sums.get(node, 0) + value
+
+    component_of = {}
+    component_sizes = []
+    for i, component in enumerate(nx.connected_components(graph)):
+        component_sizes.append(len(component))
+        for node in component:
+            component_of[node] = i
+    component_pivots = [0] * len(component_sizes)
+    for pivot in pivots:
+        component_pivots[component_of[pivot]] += 1
+
+    closeness = np.zeros(n)
+    for i, node in enumerate(nodes):
+        component = component_of[node]
+        size = component_sizes[component]
+        if size <= 1 or n <= 1:
+            continue
+        if component_pivots[component] == 0:
+            closeness[i] = nx.closeness_centrality(graph, u=node)
+            continue
+        estimated_sum = distance_sums.get(node, 0) * size / component_pivots[component]
+        if estimated_sum > 0:
+            closeness[i] = (size - 1) / estimated_sum * (size - 1) / (n - 1)
+    return closeness
+
+
+def top_k_stability(exact, approximate, k=10):
+    """
+    Compare the top k nodes of an exact and an approximate centrality.
+
+    Parameters:
+        exact (dict): {node: score} from the exact computation.
+        approximate (dict): {node: score} from the approximation.
+        k (int): Number of top nodes compared.
+
+    Returns:
+        dict: `overlap` (fraction of shared top-k nodes), `same_order` (whether the
+            shared ranking is identical) and the nodes `missing` from the approximation.
+    """
+    exact_top = [node for node, _ in sorted(exact.items(), key=lambda x: x[1], reverse=True)[:k]]
+    approximate_top = [
+        node for node, _ in sorted(approximate.items(), key=lambda x: x[1], reverse=True)[:k]
+    ]
+    shared = set(exact_top) & set(approximate_top)
+    return {
+        "overlap": len(shared) / max(len(exact_top), 1),
+        "same_order": exact_top == approximate_top,
+        "missing": [node for node in exact_top if node not in shared],
+    }
+
+
+def compute_centralities(graph, backend="igraph", processes=None, approximate=None):
+    """
+    Compute every centrality measure from one shared CSR adjacency matrix.
+
+    PageRank, eigenvector and HITS run as vectorized power iterations;
+    betweenness and closeness use igraph or a networkx process pool, or
+    pivot sampling when `approximate` is given.
+
+    Parameters:
+        graph (networkx.Graph or igraph.Graph): Input network graph. igraph
+            input is used as is; networkx is only built for the parallel
+            backend and pivot sampling.
+        backend (str): Betweenness/closeness backend, "igraph" or "parallel".
+        processes (int): Worker processes for the parallel backend and pivots.
+        approximate (dict or None): Keyword arguments of `approximate_betweenness`
+            and `approximate_closeness` (`k`, or `epsilon` and `delta`, and `seed`).
+
+    Returns:
+        dict: Measure name -> {node: score}, with the same keys and values as
+            the networkx path in centrality.py.
+    """
+    nodes, A = build_adjacency(graph)
+    n = len(nodes)
+
+    degree = np.asarray(A.sum(axis=1)).ravel() / (n - 1) if n > 1 else np.ones(n)
+    if approximate is not None:
+        nx_graph = _as_networkx(graph)
+        betweenness = approximate_betweenness(nx_graph, nodes, processes=processes, **approximate)
+        closeness = approximate_closeness(nx_graph, nodes, processes=processes, **approximate)
+    else:
+        betweenness, closeness = betweenness_closeness(graph, nodes, backend, processes)
+    eigenvector = eigenvector_csr(A)
+    pagerank = pagerank_csr(A)
+    hubs, authorities = hits_csr(A)
+
+    def as_dict(values):
+        return dict(zip(nodes, values.tolist()))
+
+    return {
+        "Degree": as_dict(degree),
+        "Betweenness": as_dict(betweenness),
+        "Closeness": as_dict(closeness),
+        "Eigenvector": as_dict(eigenvector),
+        "PageRank": as_dict(pagerank),
+        "HITS Hubs": as_dict(hubs),
+        "HITS Authorities": as_dict(authorities),
+    }
+
+
+def compute_centralities_networkx(graph):
+    """
+    Compute every centrality measure with the networkx functions, one after another.
+
+    Parameters:
+        graph (networkx.Graph): Input network graph.
+
+    Returns:
+        dict: Measure name -> {node: score}.
+    """
+    hits_hubs, hits_authorities = nx.hits(graph, max_iter=1000)
+    return {
+        "Degree": nx.degree_centrality(graph),
+        "Betweenness": nx.betweenness_centrality(graph),
+        "Closeness": nx.closeness_centrality(graph),
+        "Eigenvector": nx.eigenvector_centrality(graph, max_iter=1000),
+        "PageRank": nx.pagerank(graph),
+        "HITS Hubs": hits_hubs,
+        "HITS Authorities": hits_authorities
+    }
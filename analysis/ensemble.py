@@ -0,0 +1,183 @@
+import networkx as nx
+import numpy as np
+import igraph as ig
+import leidenalg as la
+import community.community_louvain as community_louvain
+from concurrent.futures import ProcessPoolExecutor
+
+# Graph shared by the runs of one worker process, built once by _init_worker
+_worker_graph = {}
+
+
+def graph_to_arrays(graph, is_weighted=False):
+    """
+    Flatten a networkx or igraph graph into node names and integer edge arrays.
+
+    Returns:
+        list: Node names; edge endpoints index into it.
+        np.ndarray: (m, 2) edge endpoints.
+        np.ndarray or None: Edge weights when `is_weighted`.
+    """
+    if isinstance(graph, ig.Graph):
+        edges = np.array(graph.get_edgelist(), dtype=np.int64).reshape(-1, 2)
+        weights = None
+        if is_weighted:
+            weights = np.array(
+                graph.es["weight"] if "weight" in graph.es.attributes() else [1.0] * len(edges),
+                dtype=float,
+            )
+        return graph.vs["name"], edges, weights
+
+    nodes = list(graph.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+    edges = np.array([(index[u], index[v]) for u, v in graph.edges()], dtype=np.int64).reshape(-1, 2)
+    weights = None
+    if is_weighted:
+        weights = np.array([w for _, _, w in graph.edges(data="weight", default=1.0)], dtype=float)
+    return nodes, edges, weights
+
+
+def _init_worker(n, edges, weights, algorithm):
+    _worker_graph.update(n=n, edges=edges, weights=weights, algorithm=algorithm, round=None)
+    _build_worker_graph(edges, weights)
+
+
+def _build_worker_graph(edges, weights):
+    n = _worker_graph["n"]
+    g = ig.Graph(n=n, edges=edges.tolist())
+    if weights is not None:
+        g.es["weight"] = weights.tolist()
+    nx_graph = None
+    if _worker_graph["algorithm"] == "louvain":
+        nx_graph = nx.Graph()
+        nx_graph.add_nodes_from(range(n))
+        if weights is None:
+            nx_graph.add_edges_from(edges.tolist())
+        else:
+            nx_graph.add_weighted_edges_from(
+                (int(u), int(v), float(w)) for (u, v), w in zip(edges, weights)
+            )
+    _worker_graph.update(igraph=g, networkx=nx_graph, current_weights=weights)
+
+
+def _run_seed(seed, consensus_round=None, consensus_weights=None):
+    # Consensus rounds reweight the original edges; zero-weight edges are dropped.
+    # Each worker builds a round's graph once, for the first of its seeds
+    if consensus_round != _worker_graph["round"]:
+        if consensus_round is None:
+            _build_worker_graph(_worker_graph["edges"], _worker_graph["weights"])
+        else:
+            kept = consensus_weights > 0
+            _build_worker_graph(_worker_graph["edges"][kept], consensus_weights[kept])
+        _worker_graph["round"] = consensus_round
+
+    weights = _worker_graph["current_weights"]
+    if _worker_graph["algorithm"] == "leiden":
+        g = _worker_graph["igraph"]
+        partition = la.find_partition(
+            g,
+            la.ModularityVertexPartition,
+            weights="weight" if weights is not None else None,
+            seed=seed,
+        )
+        membership = np.array(partition.membership, dtype=np.int64)
+    else:
+        graph = _worker_graph["networkx"]
+        partition = community_louvain.best_partition(graph, weight="weight", random_state=seed)
+        membership = np.array([partition[i] for i in range(graph.number_of_nodes())], dtype=np.int64)
+
+    modularity = _worker_graph["igraph"].modularity(
+        membership.tolist(), weights="weight" if weights is not None else None
+    )
+    return membership, modularity
+
+
+def _run_all(executor, n_runs, consensus_round=None, consensus_weights=None):
+    """Memberships ((n_runs, n) array) and modularities of n_runs seeded runs."""
+    results = list(executor.map(
+        _run_seed, range(n_runs), [consensus_round] * n_runs, [consensus_weights] * n_runs
+    ))
+    memberships = np.vstack([membership for membership, _ in results])
+    modularities = np.array([modularity for _, modularity in results])
+    return memberships, modularities
+
+
+def _co_assignment(memberships, edges):
+    # Fraction of runs in which the endpoints of each edge share a community
+    return (memberships[:, edges[:, 0]] == memberships[:, edges[:, 1]]).mean(axis=0)
+
+
+def run_ensemble(
+    graph, algorithm="leiden", n_runs=16, is_weighted=False, processes=None, threshold=0.5, max_iterations=2
+):
+    """
+    Run many seeded Louvain or Leiden runs in parallel and combine them.
+
+    The consensus partition follows Lancichinetti and Fortunato (2012): the
+    edges are reweighted by how often their endpoints share a community,
+    edges below `threshold` are dropped, and the same algorithm is run again
+    on that graph, until the runs agree or the consensus stops changing.
+    One worker pool serves the runs and every consensus round.
+
+    Parameters:
+        graph (networkx.Graph or igraph.Graph): The input graph.
+        algorithm (str): "leiden" or "louvain".
+        n_runs (int): Number of runs, seeded 0..n_runs-1.
+        is_weighted (bool): Use the "weight" edge attribute.
+        processes (int or None): Worker processes (default: one per CPU).
+        threshold (float): Co-assignment fraction below which an edge is
+            dropped from the consensus graph.
+        max_iterations (int): Most consensus rounds; the first run of the last
+            round is kept.
+
+    Returns:
+        dict: `partitions` (node -> label dict per run), `consensus` (node -> label),
+            `stability` (node -> mean co-assignment with its neighbours) and
+            `modularity` (mean, std, min, max over runs).
+    """
+    nodes, edges, weights = graph_to_arrays(graph, is_weighted)
+    n = len(nodes)
+
+    with ProcessPoolExecutor(
+        max_workers=processes, initializer=_init_worker, initargs=(n, edges, weights, algorithm)
+    ) as executor:
+        memberships, modularities = _run_all(executor, n_runs)
+        co_assignment = _co_assignment(memberships, edges)
+
+        # Consensus: re-cluster the co-assignment weighted graph
+        consensus_weights = co_assignment
+        consensus = memberships[0]
+        for consensus_round in range(max_iterations):
+            consensus_weights = np.where(consensus_weights >= threshold, consensus_weights, 0.0)
+            if np.all((consensus_weights == 0) | (consensus_weights == 1)):
+                # Every run already agrees on every remaining edge
+                break
+            rounds, _ = _run_all(executor, n_runs, consensus_round, consensus_weights)
+            previous, consensus = consensus, rounds[0]
+            consensus_weights = np.where(consensus_weights > 0, _co_assignment(rounds, edges), 0.0)
+            same_edges_cut = np.array_equal(
+                previous[edges[:, 0]] == previous[edges[:, 1]],
+                consensus[edges[:, 0]] == consensus[edges[:, 1]],
+            )
+            if same_edges_cut:
+                break
+
+    # Per-node stability: mean co-assignment over incident edges
+    endpoints = np.concatenate([edges[:, 0], edges[:, 1]])
+    totals = np.bincount(endpoints, weights=np.concatenate([co_assignment, co_assignment]), minlength=n)
+    degrees = np.bincount(endpoints, minlength=n)
+    stability = np.divide(totals, degrees, out=np.ones(n), where=degrees > 0)
+
+    _, consensus = np.unique(consensus, return_inverse=True)
+
+    return {
+        "partitions": [dict(zip(nodes, membership.tolist())) for membership in memberships],
+        "consensus": dict(zip(nodes, consensus.tolist())),
+        "stability": dict(zip(nodes, stability.tolist())),
+        "modularity": {
+            "mean": float(modularities.mean()),
+            "std": float(modularities.std()),
+            "min": float(modularities.min()),
+            "max": float(modularities.max()),
+        },
+    }
@@ -0,0 +1,175 @@
+import heapq
+import math
+import random
+
+import igraph as ig
+import numpy as np
+import scipy.sparse as sp
+
+# In sampled mode, share of a component's edges removed on one betweenness
+# estimate before it is re-estimated (a split always re-estimates both halves)
+SAMPLED_REESTIMATE_SHARE = 0.02
+
+
+def _community_terms(A, vertices, labels, count):
+    """Internal weight and total degree of each of `count` labelled parts of `vertices`."""
+    sub = A[vertices][:, vertices].tocoo()
+    same = labels[sub.row] == labels[sub.col]
+    internal = np.bincount(labels[sub.row[same]], weights=sub.data[same], minlength=count) / 2
+    degree = np.bincount(labels, weights=np.asarray(A[vertices].sum(axis=1)).ravel(), minlength=count)
+    return internal, degree
+
+
+def girvan_newman_best_partition(graph, max_splits=None, sample_size=None, seed=None):
+    """
+    Girvan-Newman with component-local recomputation, returning the partition
+    with the best modularity.
+
+    Removing an edge only changes shortest paths inside its own component, so
+    edge betweenness is recomputed (with igraph) for that component alone, and
+    the other components keep their best edge in a heap. Modularity is
+    updated from the two halves of a component whenever it splits.
+
+    In sampled mode, a component's estimate is reused for the next removals
+    while it stays connected, for up to SAMPLED_REESTIMATE_SHARE of its edges,
+    and each new estimate draws new random sources.
+
+    Parameters:
+        graph: NetworkX or igraph graph. Modularity uses the "weight" edge
+            attribute when present; betweenness is unweighted, as in networkx.
+        max_splits (int or None): The maximum number of splits to perform. If None,
+            will split until the graph is fully divided.
+        sample_size (int or None): Estimate edge betweenness from this many
+            random source vertices per component instead of all of them.
+        seed (int or None): Seed of the source sample.
+
+    Returns:
+        dict: A dictionary mapping nodes to their community labels.
+        float: The modularity score of the best partition.
+    """
+    from utils import to_igraph
+
+    g = to_igraph(graph)
+    n = g.vcount()
+    names = g.vs["name"]
+    edges = np.array(g.get_edgelist(), dtype=np.int64).reshape(-1, 2)
+    weights = (
+        np.array(g.es["weight"], dtype=float) if "weight" in g.es.attributes() else np.ones(len(edges))
+    )
+    A = sp.coo_matrix(
+        (np.concatenate([weights, weights]), (np.concatenate([edges[:, 0], edges[:, 1]]),
+                                              np.concatenate([edges[:, 1], edges[:, 0]]))),
+        shape=(n, n),
+    ).tocsr()
+    two_m = weights.sum() * 2 or 1.0
+    rng = random.Random(seed)
+
+    # Components: sorted vertex ids and remaining edges (global ids), per component id
+    components = g.connected_components()
+    labels = np.array(components.membership, dtype=np.int64)
+    vertices = {c: np.flatnonzero(labels == c) for c in range(len(components))}
+    component_edges = {c: edges[labels[edges[:, 0]] == c] for c in range(len(components))}
+    internal, degree = _community_terms(A, np.arange(n), labels, len(components))
+    terms = {c: internal[c] / (two_m / 2) - (degree[c] / two_m) ** 2 for c in range(len(components))}
+    modularity = sum(terms.values())
+
+    heap = []
+    # Edge betweenness of each component's remaining edges, and the removals
+    # since it was computed
+    scores = {}
+    stale = {}
+
+    def component_graph(c):
+        # Subgraph of one component, relabelled 0..k-1
+        local = np.searchsorted(vertices[c], component_edges[c])
+        return local, ig.Graph(n=len(vertices[c]), edges=local.tolist())
+
+    def push_best_edge(c, sub=None):
+        if not len(component_edges[c]):
+            return
+        k = len(vertices[c])
+        sampled = sample_size and sample_size < k
+        budget = math.ceil(SAMPLED_REESTIMATE_SHARE * len(component_edges[c])) if sampled else 0
+        if c not in scores or stale[c] >= budget:
+            if sub is None:
+                _, sub = component_graph(c)
+            if sampled:
+                sources = rng.sample(range(k), sample_size)
+                local = np.array(sub.get_edgelist()).reshape(-1, 2)
+                # Every path from a source leaves through one of its own edges, so
+                # scaling those up would make edges at sampled sources look
+                # central. Each edge is estimated from the sampled sources away
+                # from it, scaled to the k - 2 vertices that are not its ends
+                total = np.zeros(len(local))
+                own = np.zeros(len(local))
+                for source in sources:
+                    dependency = np.array(sub.edge_betweenness(directed=False, sources=[source]))
+                    total += dependency
+                    incident = sub.incident(source)
+                    own[incident] += dependency[incident]
+                at_source = np.zeros(k, dtype=bool)
+                at_source[sources] = True
+                away = sample_size - at_source[local[:, 0]] - at_source[local[:, 1]]
+                betweenness = (total - own) * (k - 2) / np.maximum(away, 1)
+            else:
+                betweenness = np.array(sub.edge_betweenness(directed=False))
+            scores[c] = betweenness
+            stale[c] = 0
+        best = int(np.argmax(scores[c]))
+        heapq.heappush(heap, (-scores[c][best], c, best))
+
+    for c in vertices:
+        push_best_edge(c)
+
+    best_partition = None
+    best_modularity = -1  # Modularity score typically ranges from -1 to 1
+    splits = 0
+    next_component = len(vertices)
+
+    while heap and (max_splits is None or splits < max_splits):
+        _, c, edge = heapq.heappop(heap)
+        remaining = np.delete(component_edges[c], edge, axis=0)
+        component_edges[c] = remaining
+        scores[c] = np.delete(scores[c], edge)
+        stale[c] += 1
+
+        # Did removing the edge split the component?
+        local, sub = component_graph(c)
+        parts = sub.connected_components()
+        if len(parts) == 1:
+            push_best_edge(c, sub)
+            continue
+
+        part_labels = np.array(parts.membership, dtype=np.int64)
+        part_internal, part_degree = _community_terms(A, vertices[c], part_labels, len(parts))
+        modularity -= terms.pop(c)
+        new_components = []
+        for p in range(len(parts)):
+            new_component = next_component
+            next_component += 1
+            vertices[new_component] = vertices[c][part_labels == p]
+            component_edges[new_component] = remaining[part_labels[local[:, 0]] == p]
+            labels[vertices[new_component]] = new_component
+            terms[new_component] = (
+                part_internal[p] / (two_m / 2) - (part_degree[p] / two_m) ** 2
+            )
+            modularity += terms[new_component]
+            new_components.append(new_component)
+        del vertices[c], component_edges[c], scores[c], stale[c]
+        for new_component in new_components:
+            push_best_edge(new_component)
+
+        splits += 1
+        # Update best partition if this partition has higher modularity
+        if modularity > best_modularity:
+            best_modularity = modularity
+            best_partition = labels.copy()
+
+    if best_partition is None:
+        # Nothing was split: the components are the only partition
+        best_partition, best_modularity = labels, modularity
+
+    # Create a dictionary of node to community label
+    _, community_labels = np.unique(best_partition, return_inverse=True)
+    node_to_community = dict(zip(names, community_labels.tolist()))
+    return node_to_community, float(best_modularity)
@@ -1,33 +1,116 @@
 import networkx as nx
 import json
+import time
 from collections import defaultdict
+from functools import partial
 
 from utils import (
-    load_unweighted_graph,
-    load_weighted_graph,
+    load_igraph,
     detect_louvain_communities,
     detect_leiden_communities,
     girvan_newman_best_partition,
     calculate_number_of_communities,
     calculate_community_sizes,
     calculate_modularity,
+    partition_statistics,
     calculate_modularity_density,
     calculate_conductance,
     visualize_communities,
     visualize_communities_based_on_hash,
     calculate_partition_similarity,
+    calculate_partition_similarity_matrix,
     label_propagation_communities,
 )
+from ensemble import run_ensemble
+from temporal import analyze_snapshots
+from result_store import ResultStore, write_partitions_to_instances
+from preprocessing import describe_preprocessing, expand_partition, preprocess_graph
+
+# Louvain implementation for single runs: "igraph" (multilevel, fast) or
+# "python-louvain" (community_louvain, as before the igraph loaders)
+LOUVAIN_BACKEND = "igraph"
+
+# Number of seeded runs per algorithm combined into a consensus partition.
+# None runs each algorithm once, unseeded.
+ENSEMBLE_RUNS = None
+
+# Edgelist snapshots of successive crawls, oldest first. When set, main()
+# tracks warm-started Leiden communities across them instead of the
+# single-graph analysis.
+SNAPSHOT_FILES = None
+SNAPSHOTS_WEIGHTED = False
+
+# Splits of the Girvan-Newman run compared with Louvain and Leiden; None
+# leaves it out. GIRVAN_NEWMAN_SAMPLES estimates edge betweenness from that
+# many sources per component (None is exact).
+GIRVAN_NEWMAN_SPLITS = None
+GIRVAN_NEWMAN_SAMPLES = 200
+
+# Pruning applied to every graph before analysis, as keyword arguments of
+# preprocess_graph, e.g. {"k_core": 2, "largest_component": True,
+# "fold_whiskers": True}. Pruned instances take the community of the node
+# they were folded into, and community sizes and metrics are reported on the
+# full graphs. None analyzes the full graphs.
+PREPROCESSING = None
+
+# Directory of cached partitions and metrics, keyed by the full graph's
+# fingerprint, algorithm and parameters (PREPROCESSING included); None
+# recomputes everything
+RESULTS_DIR = "results"
+# Write the final partitions onto the MongoDB `instances` documents
+WRITE_PARTITIONS_TO_MONGO = False
+
+
+def cached_conductance(metrics, partition):
+    """Stored conductance keyed by the partition's community labels (JSON keeps strings)."""
+    labels = {str(community): community for community in set(partition.values())}
+    return {labels[key]: value for key, value in metrics["conductance"].items()}
+
+
+def track_snapshots():
+    results = analyze_snapshots(
+        SNAPSHOT_FILES, is_weighted=SNAPSHOTS_WEIGHTED, preprocessing=PREPROCESSING
+    )
+    for result in results:
+        print(f"\n===== {result['file']} =====")
+        print(f"Changes: {result['diff']}")
+        print(f"Nodes free to move: {result['free_nodes']}")
+        print(f"Number of communities: {calculate_number_of_communities(result['partition'])}")
+        print(f"Modularity: {result['modularity']}")
+        print(f"Detection and tracking time: {result['seconds']:.2f}s")
+        events = result["events"]
+        if events is None:
+            continue
+        for event in ("continued", "merged", "split", "born", "died"):
+            print(f"{event.capitalize()}: {len(events[event])}")
+        for sources, target in events["merged"]:
+            print(f"  Merge {sources} -> {events['labels'][target]}")
+        for source, targets in events["split"]:
+            print(f"  Split {source} -> {[events['labels'][target] for target in targets]}")
 
 
 def main():
-    # Load graphs
-    unweighted_graph = load_unweighted_graph(
+    if SNAPSHOT_FILES:
+        track_snapshots()
+        return
+
+    # Load graphs straight into igraph
+    unweighted_graph = load_igraph(
         "edgelist_content.txt"
     )
-    weighted_graph = load_weighted_graph(
-        "edgelist_content_weighted.txt"
+    weighted_graph = load_igraph(
+        "edgelist_content_weighted.txt", is_weighted=True
     )
+    # Partitions are reported on the full graphs, even when detected on pruned ones
+    full_unweighted_graph, full_weighted_graph = unweighted_graph, weighted_graph
+    unweighted_mapping = weighted_mapping = {}
+    if PREPROCESSING:
+        pruned, unweighted_mapping = preprocess_graph(unweighted_graph, **PREPROCESSING)
+        print(f"Unweighted graph: {describe_preprocessing(unweighted_graph, pruned, unweighted_mapping)}")
+        unweighted_graph = pruned
+        pruned, weighted_mapping = preprocess_graph(weighted_graph, **PREPROCESSING)
+        print(f"Weighted graph: {describe_preprocessing(weighted_graph, pruned, weighted_mapping)}")
+        weighted_graph = pruned
 
     # unweighted_graph = nx.karate_club_graph()
     # weighted_graph = unweighted_graph.copy()
@@ -37,32 +120,109 @@ def main():
 
     # Define community detection algorithms
     algorithms = {
-        "Louvain": detect_louvain_communities,
+        "Louvain": partial(detect_louvain_communities, backend=LOUVAIN_BACKEND),
         "Leiden": detect_leiden_communities,
     }
+    if GIRVAN_NEWMAN_SPLITS:
+        algorithms["Girvan-Newman"] = girvan_newman_best_partition
 
     weighted_partitions = {}
     unweighted_partitions = {}
 
+    store = ResultStore(RESULTS_DIR) if RESULTS_DIR else None
+
 
     # Loop through each algorithm
     for algo_name, algo_func in algorithms.items():
         print(f"\n===== {algo_name} Algorithm =====")
 
-        # Detect communities for unweighted graph
+        start = time.perf_counter()
+
+        # Parameters that change the partition, part of the cache key
         if algo_name == "Girvan-Newman":
-            unweighted_partition, unweighted_modularity = algo_func(unweighted_graph, max_splits=2)
-            weighted_partition, weighted_modularity = algo_func(weighted_graph, max_splits=2)
+            params = {"max_splits": GIRVAN_NEWMAN_SPLITS, "sample_size": GIRVAN_NEWMAN_SAMPLES, "seed": 100}
+        else:
+            params = {"ensemble_runs": ENSEMBLE_RUNS}
+            if ENSEMBLE_RUNS:
+                params["consensus"] = "iterated"
+            elif algo_name == "Louvain":
+                params["backend"] = LOUVAIN_BACKEND
+        if PREPROCESSING:
+            params["preprocessing"] = PREPROCESSING
+        # Full-graph partitions and metrics, cached under the full graphs
+        cached = None
+        if store:
+            cached = [
+                store.get_partition(store.fingerprint(graph), algo_name, params)
+                for graph in (full_unweighted_graph, full_weighted_graph)
+            ]
+        is_cached = bool(cached and all(cached))
+
+        # Detect communities for unweighted graph
+        if is_cached:
+            print("Using cached partitions")
+            (unweighted_partition, unweighted_metrics), (weighted_partition, weighted_metrics) = cached
+            unweighted_modularity = unweighted_metrics["modularity"]
+            weighted_modularity = weighted_metrics["modularity"]
+        elif algo_name == "Girvan-Newman":
+            unweighted_partition, unweighted_modularity = algo_func(
+                unweighted_graph, max_splits=GIRVAN_NEWMAN_SPLITS, sample_size=GIRVAN_NEWMAN_SAMPLES, seed=100
+            )
+            weighted_partition, weighted_modularity = algo_func(
+                weighted_graph, max_splits=GIRVAN_NEWMAN_SPLITS, sample_size=GIRVAN_NEWMAN_SAMPLES, seed=100
+            )
+            unweighted_statistics = partition_statistics(unweighted_graph, unweighted_partition)
+            weighted_statistics = partition_statistics(weighted_graph, weighted_partition)
+        elif ENSEMBLE_RUNS:
+            partitions = {}
+            for label, graph, is_weighted in (
+                ("Unweighted", unweighted_graph, False),
+                ("Weighted", weighted_graph, True),
+            ):
+                ensemble = run_ensemble(
+                    graph, algo_name.lower(), n_runs=ENSEMBLE_RUNS, is_weighted=is_weighted
+                )
+                partitions[label] = ensemble["consensus"]
+                stability = sum(ensemble["stability"].values()) / len(ensemble["stability"])
+                print(f"{label} ensemble of {ENSEMBLE_RUNS} runs: modularity {ensemble['modularity']}, "
+                      f"mean node stability {stability:.4f}")
+            unweighted_partition = partitions["Unweighted"]
+            weighted_partition = partitions["Weighted"]
+            unweighted_statistics = partition_statistics(unweighted_graph, unweighted_partition)
+            weighted_statistics = partition_statistics(weighted_graph, weighted_partition)
+            unweighted_modularity = calculate_modularity(
+                unweighted_graph, unweighted_partition, unweighted_statistics
+            )
+            weighted_modularity = calculate_modularity(
+                weighted_graph, weighted_partition, weighted_statistics
+            )
         else:
             unweighted_partition = algo_func(unweighted_graph, is_weighted=False)
             weighted_partition = algo_func(weighted_graph, is_weighted=True)
+            unweighted_statistics = partition_statistics(unweighted_graph, unweighted_partition)
+            weighted_statistics = partition_statistics(weighted_graph, weighted_partition)
+            unweighted_modularity = calculate_modularity(
+                unweighted_graph, unweighted_partition, unweighted_statistics
+            )
+            weighted_modularity = calculate_modularity(
+                weighted_graph, weighted_partition, weighted_statistics
+            )
+
+        # Pruned instances take the community of the node they were folded into
+        if PREPROCESSING and not is_cached:
+            unweighted_partition = expand_partition(unweighted_partition, unweighted_mapping)
+            weighted_partition = expand_partition(weighted_partition, weighted_mapping)
+            unweighted_statistics = partition_statistics(full_unweighted_graph, unweighted_partition)
+            weighted_statistics = partition_statistics(full_weighted_graph, weighted_partition)
             unweighted_modularity = calculate_modularity(
-                unweighted_graph, unweighted_partition
+                full_unweighted_graph, unweighted_partition, unweighted_statistics
             )
             weighted_modularity = calculate_modularity(
-                weighted_graph, weighted_partition
+                full_weighted_graph, weighted_partition, weighted_statistics
             )
 
+        print(f"Detection and statistics time (both graphs): {time.perf_counter() - start:.2f}s")
+
         # Unweighted graph metrics
         print("\n-- Unweighted Graph --")
         num_communities_unweighted = calculate_number_of_communities(
@@ -70,12 +230,16 @@ def main():
         )
         sizes_unweighted = calculate_community_sizes(unweighted_partition)
 
-        unweighted_mod_density = calculate_modularity_density(
-            unweighted_graph, unweighted_partition
-        )
-        unweighted_conductance = calculate_conductance(
-            unweighted_graph, unweighted_partition
-        )
+        if is_cached:
+            unweighted_mod_density = unweighted_metrics["modularity_density"]
+            unweighted_conductance = cached_conductance(unweighted_metrics, unweighted_partition)
+        else:
+            unweighted_mod_density = calculate_modularity_density(
+                full_unweighted_graph, unweighted_partition, unweighted_statistics
+            )
+            unweighted_conductance = calculate_conductance(
+                full_unweighted_graph, unweighted_partition, unweighted_statistics
+            )
 
         print(f"Number of communities: {num_communities_unweighted}")
         print(f"Community sizes: {sizes_unweighted}")
@@ -85,7 +249,7 @@ def main():
 
         # Visualize unweighted graph communities
         visualize_communities_based_on_hash(
-            unweighted_graph,
+            full_unweighted_graph,
             unweighted_partition,
             f"{algo_name} Communities in Unweighted Graph",
             f"{algo_name}_unweighted_graph.png"
@@ -95,10 +259,16 @@ def main():
         print("\n-- Weighted Graph --")
         num_communities_weighted = calculate_number_of_communities(weighted_partition)
         sizes_weighted = calculate_community_sizes(weighted_partition)
-        weighted_mod_density = calculate_modularity_density(
-            weighted_graph, weighted_partition
-        )
-        weighted_conductance = calculate_conductance(weighted_graph, weighted_partition)
+        if is_cached:
+            weighted_mod_density = weighted_metrics["modularity_density"]
+            weighted_conductance = cached_conductance(weighted_metrics, weighted_partition)
+        else:
+            weighted_mod_density = calculate_modularity_density(
+                full_weighted_graph, weighted_partition, weighted_statistics
+            )
+            weighted_conductance = calculate_conductance(
+                full_weighted_graph, weighted_partition, weighted_statistics
+            )
 
         print(f"Number of communities: {num_communities_weighted}")
         print(f"Community sizes: {sizes_weighted}")
@@ -118,10 +288,25 @@ def main():
         weighted_partitions[algo_name] = weighted_partition
         unweighted_partitions[algo_name] = unweighted_partition
 
+        if store and not is_cached:
+            for graph, partition, metrics in (
+                (full_unweighted_graph, unweighted_partition, {
+                    "modularity": unweighted_modularity,
+                    "modularity_density": unweighted_mod_density,
+                    "conductance": unweighted_conductance,
+                }),
+                (full_weighted_graph, weighted_partition, {
+                    "modularity": weighted_modularity,
+                    "modularity_density": weighted_mod_density,
+                    "conductance": weighted_conductance,
+                }),
+            ):
+                store.put_partition(store.fingerprint(graph), algo_name, partition, metrics, params)
+
 
         # Visualize weighted graph communities
         visualize_communities_based_on_hash(
-            weighted_graph,
+            full_weighted_graph,
             weighted_partition,
             f"{algo_name} Communities in Weighted Graph",
             f"{algo_name}_weighted_graph.png"
@@ -133,9 +318,10 @@ def main():
     partition_values = list(weighted_partitions.values())
     partition_names = list(weighted_partitions.keys())
 
+    ari_matrix, nmi_matrix = calculate_partition_similarity_matrix(partition_values)
     for i in range(len(partition_values)):
         for j in range(i + 1, len(partition_values)):
-            ari, nmi = calculate_partition_similarity(partition_values[i], partition_values[j])
+            ari, nmi = ari_matrix[i, j], nmi_matrix[i, j]
             print(f"Comparison {partition_names[i]} vs {partition_names[j]}: ARI={ari}, NMI={nmi}")
     # Compare partitions (Louvain vs Leiden or other algorithms)
     # ari, nmi = calculate_partition_similarity(
@@ -169,6 +355,18 @@ def main():
             key = f"{algo_name.lower()}_weighted_community_{community_label}"
             community_dict[key] = instances
 
+    if WRITE_PARTITIONS_TO_MONGO:
+        partitions = {
+            f"{algo_name.lower()}_{weighting}": partition
+            for weighting, algo_partitions in (
+                ("unweighted", unweighted_partitions),
+                ("weighted", weighted_partitions),
+            )
+            for algo_name, partition in algo_partitions.items()
+        }
+        modified = write_partitions_to_instances(partitions)
+        print(f"Community labels written to {modified} instances")
+
     # # Write the collected community data to the JSON file
     # with open("communities.json", "w") as f:
     #     json.dump(community_dict, f, indent=4)
@@ -0,0 +1,93 @@
+from collections import deque
+
+import igraph as ig
+import numpy as np
+
+from utils import to_igraph
+
+
+def preprocess_graph(graph, k_core=None, largest_component=False, fold_whiskers=False):
+    """
+    Prune the parts of a graph that add cost without changing rankings or
+    community structure.
+
+    Parameters:
+        graph: NetworkX or igraph graph.
+        k_core (int or None): Keep only the k-core (vertices of coreness >= k).
+        largest_component (bool): Keep only the largest connected component.
+        fold_whiskers (bool): Fold trees hanging off the rest of the graph
+            (the 2-core's complement) into the vertex they hang from.
+
+    Returns:
+        Graph of the same type as `graph` with only the kept nodes.
+        dict: Each removed node -> the kept node it was folded into (the closest
+            kept node through removed nodes), or None for parts that were
+            dropped without any connection to the kept graph.
+    """
+    g = to_igraph(graph)
+    n = g.vcount()
+    keep = np.ones(n, dtype=bool)
+
+    min_core = max(k_core or 0, 2 if fold_whiskers else 0)
+    if min_core:
+        keep &= np.array(g.coreness(), dtype=np.int64) >= min_core
+
+    if largest_component and keep.any():
+        kept = np.flatnonzero(keep)
+        components = g.induced_subgraph(kept.tolist()).connected_components()
+        giant = np.argmax(components.sizes())
+        keep[:] = False
+        keep[kept[np.array(components.membership) == giant]] = True
+
+    # Multi-source BFS from the kept vertices through the removed ones
+    names = g.vs["name"]
+    representative = np.where(keep, np.arange(n), -1)
+    adjacency = g.get_adjlist()
+    queue = deque(np.flatnonzero(keep).tolist())
+    while queue:
+        u = queue.popleft()
+        for v in adjacency[u]:
+            if representative[v] < 0:
+                representative[v] = representative[u]
+                queue.append(v)
+
+    mapping = {
+        names[v]: (names[representative[v]] if representative[v] >= 0 else None)
+        for v in np.flatnonzero(~keep)
+    }
+
+    kept_vertices = np.flatnonzero(keep).tolist()
+    if isinstance(graph, ig.Graph):
+        return graph.induced_subgraph(kept_vertices), mapping
+    return graph.subgraph([names[v] for v in kept_vertices]).copy(), mapping
+
+
+def expand_partition(partition, mapping):
+    """
+    Give every removed node the community of the node it was folded into.
+
+    Nodes of dropped parts (mapped to None) are left out.
+    """
+    expanded = dict(partition)
+    for node, representative in mapping.items():
+        if representative is not None and representative in partition:
+            expanded[node] = partition[representative]
+    return expanded
+
+
+def expand_scores(scores, mapping, fill=0.0):
+    """Give every removed node the `fill` score, so score dicts cover the original graph."""
+    expanded = dict(scores)
+    for node in mapping:
+        expanded.setdefault(node, fill)
+    return expanded
+
+
+def describe_preprocessing(graph, pruned, mapping):
+    """One-line summary of what the preprocessing removed."""
+    g, p = to_igraph(graph), to_igraph(pruned)
+    folded = sum(1 for representative in mapping.values() if representative is not None)
+    return (
+        f"Kept {p.vcount()}/{g.vcount()} nodes and {p.ecount()}/{g.ecount()} edges; "
+        f"{folded} nodes folded into kept nodes, {len(mapping) - folded} dropped"
+    )
@@ -0,0 +1,228 @@
+import os
+import random
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib import colormaps
+from matplotlib.collections import LineCollection
+from matplotlib.colors import LogNorm, to_hex
+
+from utils import graph_fingerprint, to_igraph
+
+LAYOUT_CACHE_DIR = "visualizations/layouts"
+# Part of the layout cache key; bump when multilevel_layout changes
+LAYOUT_VERSION = 2
+# Graphs smaller than this are laid out directly, larger ones are coarsened first
+COARSEN_MIN_NODES = 1000
+# Above this many edges, edges are drawn as a rasterized density image
+EDGE_DENSITY_THRESHOLD = 20_000
+DENSITY_RESOLUTION = 2048
+# Largest communities listed in the legend
+LEGEND_LIMIT = 12
+
+# Fixed colors of the first communities (Red, Blue, Green, Orange)
+DISTINCT_COLORS = ["#E41A1C", "#377EB8", "#4DAF4A", "#FF7F00"]
+
+# Layouts computed in this process, keyed like the files in LAYOUT_CACHE_DIR
+_layout_cache = {}
+
+
+def community_colors(count):
+    """
+    `count` distinguishable colors: the four fixed ones first, then the tab20
+    palettes, then evenly spread hues.
+    """
+    colors = list(DISTINCT_COLORS)
+    for name in ("tab20", "tab20b", "tab20c"):
+        colors += [c for c in map(to_hex, colormaps[name].colors) if c not in colors]
+    hue = 0.0
+    while len(colors) < count:
+        hue = (hue + 0.618033988749895) % 1  # Golden ratio steps keep hues apart
+        colors.append(to_hex(plt.cm.hsv(hue)))
+    return colors[:count]
+
+
+def _force_layout(g, seed_positions, niter, start_temp=None):
+    weights = None
+    if "weight" in g.es.attributes():
+        # Fruchterman-Reingold needs positive weights; clamped edges keep a faint pull
+        weights = np.maximum(np.array(g.es["weight"], dtype=float), 1e-3).tolist()
+    kwargs = {"start_temp": start_temp} if start_temp is not None else {}
+    # grid=True bins the repulsive forces, so each iteration is linear in the graph size
+    return np.array(
+        g.layout_fruchterman_reingold(
+            weights=weights, niter=niter, seed=seed_positions.tolist(), grid=True, **kwargs
+        ).coords
+    )
+
+
+def multilevel_layout(g, seed=100, niter=500, refine_iter=100):
+    """
+    Force-directed layout that coarsens large graphs first.
+
+    The graph is contracted along its finest Louvain level, the coarse graph is
+    laid out recursively, and every vertex starts at its cluster's position for
+    a short, cool refinement. Small graphs get a full Fruchterman-Reingold run.
+
+    Parameters:
+        g (igraph.Graph): Graph to lay out.
+        seed (int): Seed of the initial positions and the coarsening.
+        niter (int): Iterations on the coarsest graph.
+        refine_iter (int): Iterations on each finer level.
+
+    Returns:
+        np.ndarray: (n, 2) vertex positions.
+    """
+    # igraph draws from the random module; seed it without disturbing the caller
+    state = random.getstate()
+    random.seed(seed)
+    try:
+        return _multilevel_layout(g, np.random.default_rng(seed), niter, refine_iter)
+    finally:
+        random.setstate(state)
+
+
+def _multilevel_layout(g, rng, niter, refine_iter):
+    n = g.vcount()
+    if n == 0:
+        return np.empty((0, 2))
+    if n < COARSEN_MIN_NODES:
+        return _force_layout(g, rng.uniform(-np.sqrt(n), np.sqrt(n), size=(n, 2)), niter)
+
+    membership = np.array(g.community_multilevel(return_levels=True)[0].membership)
+    coarse = g.copy()
+    coarse.contract_vertices(membership.tolist(), combine_attrs=None)
+    coarse.simplify(combine_edges=None)
+    if coarse.vcount() > 0.9 * n:
+        # Nothing left to coarsen
+        return _force_layout(g, rng.uniform(-np.sqrt(n), np.sqrt(n), size=(n, 2)), niter)
+
+    coarse_positions = _multilevel_layout(coarse, rng, niter, refine_iter)
+    # Spread the clusters over the area of a random start (about one vertex per
+    # unit square) and their members around them. igraph's grid only compares
+    # vertices in neighbouring unit cells, so a compact start makes every
+    # refinement iteration close to quadratic
+    extent = np.ptp(coarse_positions, axis=0).max() or 1.0
+    coarse_positions = coarse_positions * (2 * np.sqrt(n) / extent)
+    spread = np.sqrt(np.bincount(membership))[membership, None] / 2
+    positions = coarse_positions[membership] + rng.normal(size=(n, 2)) * spread
+    return _force_layout(g, positions, refine_iter, start_temp=np.sqrt(n) / 50)
+
+
+def compute_layout(graph, seed=100, cache_dir=LAYOUT_CACHE_DIR):
+    """
+    Layout of the graph, cached in memory and on disk by graph fingerprint.
+
+    Parameters:
+        graph: NetworkX or igraph graph.
+        seed (int): Layout seed.
+        cache_dir (str or None): Directory of the cached layouts, or None to
+            keep them in memory only.
+
+    Returns:
+        dict: Node -> (x, y) position.
+    """
+    g = to_igraph(graph)
+    key = f"{graph_fingerprint(g)}_{seed}_v{LAYOUT_VERSION}"
+    if key in _layout_cache:
+        return _layout_cache[key]
+
+    path = os.path.join(cache_dir, f"{key}.npz") if cache_dir else None
+    if path and os.path.exists(path):
+        stored = np.load(path, allow_pickle=True)
+        names, positions = stored["names"].tolist(), stored["positions"]
+    else:
+        names = g.vs["name"]
+        positions = multilevel_layout(g, seed)
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            np.savez_compressed(path, names=np.array(names, dtype=object), positions=positions)
+
+    layout = dict(zip(names, map(tuple, positions)))
+    _layout_cache[key] = layout
+    return layout
+
+
+def _edge_density(segments, extent, resolution=DENSITY_RESOLUTION, chunk_samples=2_000_000):
+    """Count how many edges pass through each pixel of a resolution x resolution grid."""
+    x_min, x_max, y_min, y_max = extent
+    scale = (resolution - 1) / np.array([x_max - x_min or 1, y_max - y_min or 1])
+    segments = (segments - [x_min, y_min]) * scale
+    # One sample per pixel of edge length
+    counts = np.maximum(np.ceil(np.linalg.norm(segments[:, 1] - segments[:, 0], axis=1)), 1).astype(np.int64) + 1
+    # Chunk boundaries at every `chunk_samples` samples, so memory does not
+    # grow with the edge lengths (a single edge longer than that is one chunk)
+    ends = np.cumsum(counts)
+    boundaries = np.unique(np.searchsorted(ends, np.arange(chunk_samples, ends[-1] if len(ends) else 0, chunk_samples)))
+    density = np.zeros(resolution * resolution)
+    for start, stop in zip([0, *(boundaries + 1)], [*(boundaries + 1), len(segments)]):
+        if start >= stop:
+            continue
+        chunk, chunk_counts = segments[start:stop], counts[start:stop]
+        edge = np.repeat(np.arange(len(chunk)), chunk_counts)
+        offsets = np.repeat(np.cumsum(chunk_counts) - chunk_counts, chunk_counts)
+        t = ((np.arange(chunk_counts.sum()) - offsets) / np.repeat(chunk_counts - 1, chunk_counts))[:, None]
+        points = chunk[edge, 0] + t * (chunk[edge, 1] - chunk[edge, 0])
+        pixels = np.rint(points).astype(np.int64)
+        density += np.bincount(pixels[:, 1] * resolution + pixels[:, 0], minlength=resolution * resolution)
+    return density.reshape(resolution, resolution)
+
+
+def draw_communities(graph, node_colors, legend, output_path, node_size=20, seed=100):
+    """
+    Draw the graph with a cached layout, one scatter call for the nodes and the
+    edges as line segments or, for large graphs, a rasterized density image.
+
+    Parameters:
+        graph: NetworkX or igraph graph.
+        node_colors (dict): Node -> color.
+        legend (list): (label, color) entries of the legend.
+        output_path (str): PNG file written.
+        node_size (int): Marker size of the nodes.
+        seed (int): Layout seed.
+    """
+    g = to_igraph(graph)
+    layout = compute_layout(g, seed)
+    names = g.vs["name"]
+    positions = np.array([layout[name] for name in names]).reshape(-1, 2)
+    edges = np.array(g.get_edgelist(), dtype=np.int64).reshape(-1, 2)
+    segments = positions[edges]
+
+    fig, ax = plt.subplots(figsize=(12, 12))
+    if len(edges) > EDGE_DENSITY_THRESHOLD:
+        extent = (positions[:, 0].min(), positions[:, 0].max(), positions[:, 1].min(), positions[:, 1].max())
+        density = _edge_density(segments, extent)
+        ax.imshow(
+            np.ma.masked_equal(density, 0), extent=extent, origin="lower", cmap="Greys",
+            norm=LogNorm(), alpha=0.5, interpolation="nearest", zorder=0,
+        )
+    else:
+        ax.add_collection(LineCollection(segments, colors="gray", alpha=0.2, linewidths=0.3, rasterized=True, zorder=0))
+
+    ax.scatter(
+        positions[:, 0], positions[:, 1], c=[node_colors.get(name, "#BBBBBB") for name in names],
+        s=node_size, linewidths=0, rasterized=len(names) > EDGE_DENSITY_THRESHOLD, zorder=1,
+    )
+    ax.autoscale_view()
+    ax.set_aspect("equal")
+
+    legend_handles = [
+        plt.Line2D([0], [0], marker='o', color='w', markerfacecolor=color, markersize=10)
+        for _, color in legend
+    ]
+    ax.legend(legend_handles, [label for label, _ in legend],
+              title="Communities", loc="upper right", fontsize='small', title_fontsize='medium')
+
+    ax.axis('off')
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    fig.savefig(output_path, format='png', dpi=300, bbox_inches='tight')
+    plt.close(fig)
+
+
+def legend_entries(labels, colors, sizes, limit=LEGEND_LIMIT):
+    """Legend of the `limit` largest communities, with a count of the rest."""
+    largest = sorted(range(len(labels)), key=lambda i: -sizes[i])[:limit]
+    entries = [(labels[i], colors[i]) for i in sorted(largest)]
+    if len(labels) > limit:
+        entries.append((f"+{len(labels) - limit} smaller communities", "#BBBBBB"))
+    return entries
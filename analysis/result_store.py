@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+
+from utils import graph_fingerprint
+
+RESULTS_DIR = "results"
+
+# mongodbDriver is shared with the pipeline scripts at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _params_key(params):
+    encoded = json.dumps(params or {}, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+def _node_array(nodes):
+    # Keep integer node names as integers, so loaded results match the graph
+    if all(isinstance(node, (int, np.integer)) and not isinstance(node, bool) for node in nodes):
+        return np.array(nodes, dtype=np.int64)
+    if all(isinstance(node, str) for node in nodes):
+        return np.array(nodes, dtype=str)
+    raise TypeError("Only graphs with all-string or all-integer node names can be stored")
+
+
+class ResultStore:
+    def __init__(self, directory=RESULTS_DIR):
+        """
+        Store of analysis results, one npz file per graph fingerprint, result
+        kind, algorithm and parameters.
+
+        Args:
+            directory (str): Directory of the npz files (default: results).
+        """
+        self.directory = directory
+        self._fingerprints = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def fingerprint(self, graph):
+        """Fingerprint of a graph, computed once per graph object."""
+        key = id(graph)
+        if key not in self._fingerprints:
+            # Keep the graph referenced so its id is not reused
+            self._fingerprints[key] = (graph, graph_fingerprint(graph))
+        return self._fingerprints[key][1]
+
+    def _path(self, fingerprint, kind, algorithm, params):
+        name = f"{fingerprint[:16]}_{kind}_{algorithm.lower()}_{_params_key(params)}.npz"
+        return os.path.join(self.directory, name)
+
+    def _load(self, path):
+        if not os.path.exists(path):
+            return None
+        with np.load(path, allow_pickle=False) as stored:
+            return {key: stored[key] for key in stored.files}
+
+    def _save(self, path, **arrays):
+        # Write next to the target and rename, so readers never see half a file
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(temporary, path)
+
+    def get_centralities(self, fingerprint, params=None):
+        """
+        Cached centralities of a graph.
+
+        Returns:
+            dict or None: Measure name -> {node: score}, as `compute_centralities` returns.
+        """
+        stored = self._load(self._path(fingerprint, "centrality", "all", params))
+        if stored is None:
+            return None
+        nodes = stored.pop("nodes").tolist()
+        return {measure: dict(zip(nodes, values.tolist())) for measure, values in stored.items()}
+
+    def put_centralities(self, fingerprint, centralities, params=None):
+        """Store centralities as one float64 column per measure over a shared node column."""
+        nodes = list(next(iter(centralities.values())))
+        columns = {
+            measure: np.array([values.get(node, 0.0) for node in nodes], dtype=np.float64)
+            for measure, values in centralities.items()
+        }
+        self._save(
+            self._path(fingerprint, "centrality", "all", params),
+            nodes=_node_array(nodes), **columns,
+        )
+
+    def get_partition(self, fingerprint, algorithm, params=None):
+        """
+        Cached partition of a graph.
+
+        Returns:
+            tuple or None: (node -> label dict, metrics dict).
+        """
+        stored = self._load(self._path(fingerprint, "partition", algorithm, params))
+        if stored is None:
+            return None
+        partition = dict(zip(stored["nodes"].tolist(), stored["labels"].tolist()))
+        return partition, json.loads(str(stored["metrics"]))
+
+    def put_partition(self, fingerprint, algorithm, partition, metrics=None, params=None):
+        """
+        Store a partition as node and int64 label columns, with its metrics as JSON.
+
+        Labels that are not integers are replaced by their index in sorted order.
+        """
+        nodes = list(partition)
+        labels = list(partition.values())
+        if not all(isinstance(label, (int, np.integer)) for label in labels):
+            labels = np.unique(np.array(labels, dtype=str), return_inverse=True)[1]
+        self._save(
+            self._path(fingerprint, "partition", algorithm, params),
+            nodes=_node_array(nodes),
+            labels=np.array(labels, dtype=np.int64),
+            metrics=np.array(json.dumps(metrics or {}, default=float)),
+        )
+
+
+def write_partitions_to_instances(
+    partitions,
+    host="localhost",
+    port=27017,
+    username="admin",
+    password="password",
+    database_name="mastodon-analysis",
+    batch_size=1000,
+):
+    """
+    Write community labels onto the `instances` documents in bulk.
+
+    Each instance gets `communities.<name>: label` for every partition it
+    appears in, with one UpdateOne per instance.
+
+    Args:
+        partitions (dict): Partition name (e.g. leiden_weighted) -> {instance: label}.
+        host, port, username, password, database_name: Passed to MongoDBManager.
+        batch_size (int): Updates sent per bulk_write call (default: 1000).
+
+    Returns:
+        int: Number of modified documents.
+    """
+    from pymongo import UpdateOne
+
+    from mongodbDriver import MongoDBManager
+
+    labels_by_instance = {}
+    for name, partition in partitions.items():
+        for instance, label in partition.items():
+            labels_by_instance.setdefault(instance, {})[f"communities.{name}"] = int(label)
+
+    db_manager = MongoDBManager(
+        host=host,
+        port=port,
+        username=username,
+        password=password,
+        database_name=database_name,
+    )
+    try:
+        db_manager.connect()
+        collection = db_manager.get_database()["instances"]
+        operations = [
+            UpdateOne({"name": instance}, {"$set": fields})
+            for instance, fields in labels_by_instance.items()
+        ]
+        modified = 0
+        for start in range(0, len(operations), batch_size):
+            result = collection.bulk_write(operations[start : start + batch_size], ordered=False)
+            modified += result.modified_count
+        return modified
+    finally:
+        db_manager.close()
@@ -0,0 +1,246 @@
+import time
+from collections import Counter, defaultdict
+
+import leidenalg as la
+import numpy as np
+
+from preprocessing import expand_partition, preprocess_graph
+from utils import load_igraph
+
+
+def _edge_set(g):
+    names = g.vs["name"]
+    weights = g.es["weight"] if "weight" in g.es.attributes() else [None] * g.ecount()
+    return {
+        tuple(sorted((names[u], names[v]))): w for (u, v), w in zip(g.get_edgelist(), weights)
+    }
+
+
+def diff_snapshots(previous, current):
+    """
+    Nodes touched by the changes between two snapshots.
+
+    Parameters:
+        previous (igraph.Graph): Earlier snapshot, or None.
+        current (igraph.Graph): Later snapshot.
+
+    Returns:
+        dict: `added_nodes`, `removed_nodes`, `added_edges`, `removed_edges`,
+            `reweighted_edges` (counts) and `touched` (set of current nodes that
+            are new or have an added, removed or reweighted edge).
+    """
+    if previous is None:
+        names = set(current.vs["name"])
+        return {
+            "added_nodes": len(names), "removed_nodes": 0, "added_edges": current.ecount(),
+            "removed_edges": 0, "reweighted_edges": 0, "touched": names,
+        }
+
+    previous_names, current_names = set(previous.vs["name"]), set(current.vs["name"])
+    previous_edges, current_edges = _edge_set(previous), _edge_set(current)
+
+    added = current_edges.keys() - previous_edges.keys()
+    removed = previous_edges.keys() - current_edges.keys()
+    reweighted = [
+        edge for edge in current_edges.keys() & previous_edges.keys()
+        if current_edges[edge] != previous_edges[edge]
+    ]
+
+    touched = current_names - previous_names
+    for u, v in [*added, *removed, *reweighted]:
+        touched.update((u, v))
+    return {
+        "added_nodes": len(current_names - previous_names),
+        "removed_nodes": len(previous_names - current_names),
+        "added_edges": len(added),
+        "removed_edges": len(removed),
+        "reweighted_edges": len(reweighted),
+        "touched": touched & current_names,
+    }
+
+
+def warm_start_leiden(g, previous_partition=None, touched=None, is_weighted=False, radius=1, seed=None):
+    """
+    Leiden on a snapshot, started from the previous snapshot's partition.
+
+    Nodes keep their previous community and new nodes start as singletons.
+    When `touched` is given, only the touched nodes and their neighbours up to
+    `radius` hops may move, so the work follows the size of the change.
+
+    Parameters:
+        g (igraph.Graph): Current snapshot.
+        previous_partition (dict or None): Node -> label of the previous snapshot.
+        touched (set or None): Nodes changed since the previous snapshot.
+        is_weighted (bool): Use the "weight" edge attribute.
+        radius (int): Hops around touched nodes that are free to move.
+        seed (int or None): Seed of the optimiser.
+
+    Returns:
+        dict: Node -> community label.
+        int: Number of nodes free to move.
+    """
+    names = g.vs["name"]
+    weights = "weight" if is_weighted and "weight" in g.es.attributes() else None
+
+    initial = None
+    fixed = None
+    if previous_partition:
+        labels = {}
+        initial = []
+        for name in names:
+            if name in previous_partition:
+                initial.append(labels.setdefault(previous_partition[name], len(labels)))
+            else:
+                initial.append(None)
+        next_label = len(labels)
+        for i, label in enumerate(initial):
+            if label is None:
+                initial[i] = next_label
+                next_label += 1
+
+        if touched is not None:
+            index = {name: i for i, name in enumerate(names)}
+            seeds = [index[name] for name in touched if name in index]
+            free = set()
+            for neighbourhood in g.neighborhood(seeds, order=radius):
+                free.update(neighbourhood)
+            fixed = [i not in free for i in range(len(names))]
+
+    partition = la.ModularityVertexPartition(g, initial_membership=initial, weights=weights)
+    optimiser = la.Optimiser()
+    if seed is not None:
+        optimiser.set_rng_seed(seed)
+    optimiser.optimise_partition(partition, n_iterations=-1, is_membership_fixed=fixed)
+
+    free_nodes = len(names) if fixed is None else len(names) - sum(fixed)
+    return dict(zip(names, partition.membership)), free_nodes
+
+
+def community_events(previous_partition, current_partition, threshold=0.3):
+    """
+    Match the communities of two snapshots and classify what happened to them.
+
+    Community A of the previous snapshot is linked to community B of the
+    current one when at least `threshold` of A's surviving nodes moved to B,
+    or at least `threshold` of B's nodes came from A.
+
+    Returns:
+        dict: `continued` [(A, B)], `merged` [([A...], B)], `split` [(A, [B...])],
+            `born` [B] and `died` [A], plus `labels`: current label -> persistent
+            label, which follows continued, merged and split communities (the
+            largest part keeps the old label) and gives born ones fresh labels.
+    """
+    previous_members = defaultdict(set)
+    for node, label in previous_partition.items():
+        previous_members[label].add(node)
+    current_members = defaultdict(set)
+    for node, label in current_partition.items():
+        current_members[label].add(node)
+
+    overlap = Counter(
+        (previous_partition[node], label)
+        for node, label in current_partition.items()
+        if node in previous_partition
+    )
+    surviving = Counter(previous_partition[node] for node in current_partition if node in previous_partition)
+
+    outgoing = defaultdict(list)
+    incoming = defaultdict(list)
+    for (a, b), shared in overlap.items():
+        if shared >= threshold * surviving[a] or shared >= threshold * len(current_members[b]):
+            outgoing[a].append((shared, b))
+            incoming[b].append((shared, a))
+
+    events = {"continued": [], "merged": [], "split": [], "born": [], "died": []}
+    for a in previous_members:
+        if not outgoing[a]:
+            events["died"].append(a)
+        elif len(outgoing[a]) > 1:
+            events["split"].append((a, [b for _, b in sorted(outgoing[a], reverse=True)]))
+    for b in current_members:
+        if not incoming[b]:
+            events["born"].append(b)
+        elif len(incoming[b]) > 1:
+            events["merged"].append(([a for _, a in sorted(incoming[b], reverse=True)], b))
+        else:
+            a = incoming[b][0][1]
+            if len(outgoing[a]) == 1:
+                events["continued"].append((a, b))
+
+    # Persistent labels: each current community takes the label of its largest
+    # source, unless a larger part of that source already took it
+    labels = {}
+    taken = set()
+    for shared, a, b in sorted(
+        ((shared, a, b) for b, sources in incoming.items() for shared, a in sources), reverse=True
+    ):
+        if b not in labels and a not in taken:
+            labels[b] = a
+            taken.add(a)
+    next_label = max([*previous_members, *taken, -1], default=-1) + 1
+    for b in sorted(current_members):
+        if b not in labels:
+            labels[b] = next_label
+            next_label += 1
+    events["labels"] = labels
+    return events
+
+
+def analyze_snapshots(file_paths, is_weighted=False, threshold=0.3, radius=1, seed=None, preprocessing=None):
+    """
+    Track Leiden communities across a sequence of edgelist snapshots.
+
+    The first snapshot is partitioned from scratch; each later one is
+    warm-started from the previous partition, with only the nodes around
+    the changes free to move.
+
+    Parameters:
+        file_paths (list): Edgelist files, oldest first.
+        is_weighted (bool): Read weighted edgelists.
+        threshold (float): Overlap share linking communities across snapshots.
+        radius (int): Hops around changed nodes that may change community.
+        seed (int or None): Seed of the optimiser.
+        preprocessing (dict or None): Keyword arguments of `preprocess_graph`
+            applied to every snapshot; pruned nodes take the label of the node
+            they were folded into.
+
+    Returns:
+        list: One dict per snapshot with `file`, `partition` (node -> persistent
+            label), `modularity`, `diff` counts, `free_nodes`, `events` and
+            `seconds` spent on community detection and tracking.
+    """
+    results = []
+    previous_graph = None
+    previous_partition = None
+    for file_path in file_paths:
+        g = load_igraph(file_path, is_weighted=is_weighted)
+        mapping = {}
+        if preprocessing:
+            g, mapping = preprocess_graph(g, **preprocessing)
+
+        start = time.perf_counter()
+        diff = diff_snapshots(previous_graph, g)
+        partition, free_nodes = warm_start_leiden(
+            g, previous_partition, diff["touched"] if previous_partition else None,
+            is_weighted, radius, seed,
+        )
+        if previous_partition is None:
+            events = None
+        else:
+            events = community_events(previous_partition, partition, threshold)
+            partition = {node: events["labels"][label] for node, label in partition.items()}
+        seconds = time.perf_counter() - start
+
+        membership = np.unique([partition[name] for name in g.vs["name"]], return_inverse=True)[1]
+        weights = "weight" if is_weighted and "weight" in g.es.attributes() else None
+        results.append({
+            "file": file_path,
+            "partition": expand_partition(partition, mapping),
+            "modularity": g.modularity(membership.tolist(), weights=weights),
+            "diff": {key: value for key, value in diff.items() if key != "touched"},
+            "free_nodes": free_nodes,
+            "events": events,
+            "seconds": seconds,
+        })
+        previous_graph, previous_partition = g, partition
+    return results
@@ -0,0 +1,20 @@
+import networkx as nx
+
+from ensemble import run_ensemble
+
+
+def _modularity(graph, partition):
+    communities = {}
+    for node, label in partition.items():
+        communities.setdefault(label, set()).add(node)
+    return nx.community.modularity(graph, communities.values())
+
+
+def test_consensus_keeps_modularity_on_graph_without_planted_communities():
+    graph = nx.powerlaw_cluster_graph(1000, 3, 0.3, seed=1)
+    for algorithm in ("leiden", "louvain"):
+        ensemble = run_ensemble(graph, algorithm, n_runs=4, processes=2)
+        consensus = ensemble["consensus"]
+        assert set(consensus) == set(graph)
+        assert len(set(consensus.values())) > 1
+        assert _modularity(graph, consensus) >= 0.9 * ensemble["modularity"]["mean"]
@@ -1,5 +1,4 @@
 import networkx as nx
-from sklearn.metrics import adjusted_rand_score, normalized_mutual_info_score
 import igraph as ig
 from collections import defaultdict
 import community.community_louvain as community_louvain
@@ -10,6 +9,7 @@ import random
 from networkx.algorithms.community import girvan_newman, label_propagation_communities
 import itertools
 import hashlib
+import numpy as np
 
 # Load unweighted edgelist
 def load_unweighted_graph(file_path):
@@ -30,17 +30,95 @@ def load_weighted_graph(file_path):
                 raise ValueError(f"Invalid line in file: {line}")
     return G
 
-# Detect communities using Louvain algorithm
-def detect_louvain_communities(graph, is_weighted=False):
+# Load an edgelist straight into igraph, with vertex names as the id->name table.
+# Comments after '#' and blank lines are skipped, as nx.read_edgelist does
+def load_igraph(file_path, is_weighted=False):
+    names = {}
+    edges = []
+    weights = []
+    with open(file_path, 'r') as file:
+        for line in file:
+            parts = line.split('#')[0].split()
+            if not parts or (not is_weighted and len(parts) < 2):
+                continue
+            if len(parts) < 2 or (is_weighted and len(parts) != 3):
+                raise ValueError(f"Invalid line in file: {line}")
+            u = names.setdefault(parts[0], len(names))
+            v = names.setdefault(parts[1], len(names))
+            edges.append((u, v))
+            if is_weighted:
+                weights.append(max(float(parts[2]), 0))  # Set negative weights to 0
+
+    g = ig.Graph(n=len(names), edges=edges)
+    g.vs["name"] = list(names)
+    if is_weighted:
+        g.es["weight"] = weights
+    # Collapse repeated edges like networkx does, keeping the last weight
+    g.simplify(multiple=True, loops=False, combine_edges="last")
+    return g
+
+# Build a networkx graph from igraph, only for networkx-only algorithms
+def to_networkx(graph):
+    if isinstance(graph, nx.Graph):
+        return graph
+    G = nx.Graph()
+    names = graph.vs["name"]
+    G.add_nodes_from(names)
+    if "weight" in graph.es.attributes():
+        G.add_weighted_edges_from(
+            (names[u], names[v], w) for (u, v), w in zip(graph.get_edgelist(), graph.es["weight"])
+        )
+    else:
+        G.add_edges_from((names[u], names[v]) for u, v in graph.get_edgelist())
+    return G
+
+# Build an igraph graph from networkx, with node names on the "name" attribute
+def to_igraph(graph):
+    if isinstance(graph, ig.Graph):
+        return graph
+    names = list(graph.nodes())
+    index = {node: i for i, node in enumerate(names)}
+    g = ig.Graph(n=len(names), edges=[(index[u], index[v]) for u, v in graph.edges()])
+    g.vs["name"] = names
+    if any("weight" in data for _, _, data in graph.edges(data=True)):
+        g.es["weight"] = [w for _, _, w in graph.edges(data="weight", default=1.0)]
+    return g
+
+# Content hash of a graph: the same nodes, edges and weights give the same
+# fingerprint whatever the loader, node order or edge direction
+def graph_fingerprint(graph):
+    g = to_igraph(graph)
+    names = [str(name) for name in g.vs["name"]]
+    weights = g.es["weight"] if "weight" in g.es.attributes() else [None] * g.ecount()
+    lines = sorted(
+        "\t".join(sorted((names[u], names[v]))) + ("" if w is None else f"\t{float(w)!r}")
+        for (u, v), w in zip(g.get_edgelist(), weights)
+    )
+    digest = hashlib.sha256()
+    digest.update("\n".join(sorted(names)).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update("\n".join(lines).encode("utf-8"))
+    return digest.hexdigest()
+
+# Detect communities using Louvain algorithm. igraph graphs use igraph's
+# multilevel implementation unless backend="python-louvain" is asked for
+def detect_louvain_communities(graph, is_weighted=False, backend="igraph"):
+    if backend not in ("igraph", "python-louvain"):
+        raise ValueError(f"Unknown Louvain backend: {backend}")
+    if isinstance(graph, ig.Graph) and backend == "igraph":
+        weights = "weight" if is_weighted and "weight" in graph.es.attributes() else None
+        membership = graph.community_multilevel(weights=weights).membership
+        return dict(zip(graph.vs["name"], membership))
+
     if is_weighted:
-      partition = community_louvain.best_partition(graph, weight='weight')
+      partition = community_louvain.best_partition(to_networkx(graph), weight='weight')
     else:
-      partition = community_louvain.best_partition(graph)
+      partition = community_louvain.best_partition(to_networkx(graph))
     return partition
 
 # Detect communities using Leiden algorithm (igraph)
 def detect_leiden_communities(graph, is_weighted=False):
-    g = ig.Graph.from_networkx(graph)
+    g = graph if isinstance(graph, ig.Graph) else ig.Graph.from_networkx(graph)
     
     # Extract weights if the graph is weighted
     weights = g.es["weight"] if is_weighted and "weight" in g.es.attributes() else None
@@ -49,7 +127,8 @@ def detect_leiden_communities(graph, is_weighted=False):
     partition = la.find_partition(g, la.ModularityVertexPartition, weights=weights)
 
     # Create a dictionary mapping nodes to their community labels
-    node_to_community = {node: community for node, community in zip(graph.nodes(), partition.membership)}
+    nodes = g.vs["name"] if isinstance(graph, ig.Graph) else graph.nodes()
+    node_to_community = {node: community for node, community in zip(nodes, partition.membership)}
 
     return node_to_community
 
@@ -61,19 +140,29 @@ def detect_label_propagation_communities(graph):
 
     return node_to_community
 
-def girvan_newman_best_partition(graph, max_splits=None):
+def girvan_newman_best_partition(graph, max_splits=None, engine="fast", sample_size=None, seed=None):
     """
     Perform the Girvan-Newman algorithm and return the best partition based on modularity.
 
     Parameters:
-        graph (networkx.Graph): The input graph.
+        graph (networkx.Graph or igraph.Graph): The input graph.
         max_splits (int or None): The maximum number of splits to perform. If None, will split until the graph is fully divided.
+        engine (str): "fast" for component-local recomputation with igraph and
+            incremental modularity, "networkx" for networkx's girvan_newman.
+        sample_size (int or None): Sampled betweenness sources per component (fast engine only).
+        seed (int or None): Seed of the sampled sources.
 
     Returns:
         dict: A dictionary mapping nodes to their community labels.
         float: The modularity score of the best partition.
     """
+    if engine == "fast":
+        from girvan_newman_engine import girvan_newman_best_partition as fast_girvan_newman
+
+        return fast_girvan_newman(graph, max_splits, sample_size, seed)
+
     # Generate communities using Girvan-Newman
+    graph = to_networkx(graph)
     comp = girvan_newman(graph)
     
     # Initialize variables to store the best partition and modularity score
@@ -101,22 +190,173 @@ def girvan_newman_best_partition(graph, max_splits=None):
     return node_to_community, best_modularity
 
 
+def partition_statistics(graph, partition, weight='weight'):
+    """
+    Per-community edge statistics of a partition, from a single pass over the edges.
+
+    Parameters:
+        graph: NetworkX or igraph graph.
+        partition: Dictionary mapping nodes to community labels.
+        weight: Edge attribute used as weight (missing weights count as 1).
+
+    Returns:
+        dict with
+            labels: Community labels, in order of first appearance in the partition.
+            internal: Total weight of edges inside each community.
+            volume: Sum of weighted degrees of each community's nodes.
+            cut: Total weight of edges leaving each community.
+            total_weight: Total edge weight of the graph.
+    """
+    # Turn the partition into integer labels once
+    label_index = {}
+    for community in partition.values():
+        label_index.setdefault(community, len(label_index))
+    node_label = {node: label_index[community] for node, community in partition.items()}
+
+    if isinstance(graph, ig.Graph):
+        vertex_labels = np.array([node_label.get(name, -1) for name in graph.vs["name"]], dtype=np.int64)
+        edges = np.array(graph.get_edgelist(), dtype=np.int64).reshape(-1, 2)
+        u_labels = vertex_labels[edges[:, 0]]
+        v_labels = vertex_labels[edges[:, 1]]
+        if weight in graph.es.attributes():
+            weights = np.array(graph.es[weight], dtype=float)
+        else:
+            weights = np.ones(len(edges))
+    else:
+        edges = list(graph.edges(data=weight, default=1))
+        u_labels = np.fromiter((node_label.get(u, -1) for u, _, _ in edges), dtype=np.int64, count=len(edges))
+        v_labels = np.fromiter((node_label.get(v, -1) for _, v, _ in edges), dtype=np.int64, count=len(edges))
+        weights = np.fromiter((w for _, _, w in edges), dtype=float, count=len(edges))
+
+    k = len(label_index)
+    same = (u_labels == v_labels) & (u_labels >= 0)
+    internal = np.bincount(u_labels[same], weights=weights[same], minlength=k)
+    volume = (
+        np.bincount(u_labels[u_labels >= 0], weights=weights[u_labels >= 0], minlength=k)
+        + np.bincount(v_labels[v_labels >= 0], weights=weights[v_labels >= 0], minlength=k)
+    )
+
+    return {
+        "labels": list(label_index),
+        "internal": internal,
+        "volume": volume,
+        "cut": volume - 2 * internal,
+        "total_weight": weights.sum(),
+    }
+
+
 # Calculate modularity
-def calculate_modularity(graph, partition):
-    communities = defaultdict(list)
-    for node, community in partition.items():
-        communities[community].append(node)
-    community_list = list(communities.values())
-    return modularity(graph, community_list)
-
-# Calculate ARI and NMI between two partitions
-def calculate_partition_similarity(partition1, partition2):
-    labels1 = list(partition1.values())
-    labels2 = list(partition2.values())
-    ari = adjusted_rand_score(labels1, labels2)
-    nmi = normalized_mutual_info_score(labels1, labels2)
+def calculate_modularity(graph, partition, statistics=None):
+    statistics = statistics or partition_statistics(graph, partition)
+    m = statistics["total_weight"]
+    return float(np.sum(statistics["internal"] / m - (statistics["volume"] / (2 * m)) ** 2))
+
+def align_partitions(partitions, missing="intersect"):
+    """
+    Align partitions on a shared node index.
+
+    Parameters:
+        partitions (list): Dictionaries mapping nodes to community labels.
+        missing (str): How to treat nodes absent from some partitions:
+            "intersect" compares only nodes present in every partition;
+            "singleton" keeps every node and puts each missing one in its own community.
+
+    Returns:
+        list: Shared node index.
+        np.ndarray: (len(partitions), len(nodes)) matrix of labels 0..k-1 per row.
+    """
+    if missing == "intersect":
+        shared = set(partitions[0])
+        for partition in partitions[1:]:
+            shared &= set(partition)
+        nodes = [node for node in partitions[0] if node in shared]
+    elif missing == "singleton":
+        nodes = list(dict.fromkeys(node for partition in partitions for node in partition))
+    else:
+        raise ValueError(f"Unknown missing-node policy: {missing}")
+
+    labels = np.empty((len(partitions), len(nodes)), dtype=np.int64)
+    for row, partition in enumerate(partitions):
+        label_index = {}
+        for column, node in enumerate(nodes):
+            # A fresh key per missing node makes it a singleton community
+            community = partition[node] if node in partition else ("missing", node)
+            labels[row, column] = label_index.setdefault(community, len(label_index))
+    return nodes, labels
+
+
+def _comb2(x):
+    return x * (x - 1) / 2
+
+
+def calculate_partition_similarity_matrix(partitions, missing="intersect"):
+    """
+    ARI and NMI between every pair of partitions, aligned on shared nodes.
+
+    Cluster sizes and entropies are computed once per partition; each pair only
+    needs its contingency table. NMI uses the arithmetic mean normalization,
+    as sklearn does by default.
+
+    Parameters:
+        partitions (list): Dictionaries mapping nodes to community labels.
+        missing (str): Missing-node policy, see `align_partitions`.
+
+    Returns:
+        np.ndarray: ARI matrix.
+        np.ndarray: NMI matrix.
+    """
+    _, labels = align_partitions(partitions, missing)
+    p, n = labels.shape
+    ari = np.ones((p, p))
+    nmi = np.ones((p, p))
+    if n == 0:
+        return ari, nmi
+
+    sizes = [np.bincount(row) for row in labels]
+    pair_counts = [_comb2(size).sum() for size in sizes]
+    entropies = [-np.sum((size / n) * np.log(size / n)) for size in sizes]
+    total_pairs = _comb2(n)
+
+    for i in range(p):
+        for j in range(i + 1, p):
+            ki, kj = len(sizes[i]), len(sizes[j])
+            contingency = np.bincount(labels[i] * kj + labels[j], minlength=ki * kj)
+            nonzero = contingency[contingency > 0]
+
+            # Adjusted Rand Index
+            expected = pair_counts[i] * pair_counts[j] / total_pairs if total_pairs else 0.0
+            maximum = (pair_counts[i] + pair_counts[j]) / 2
+            if maximum == expected:
+                ari[i, j] = 1.0
+            else:
+                ari[i, j] = (_comb2(nonzero).sum() - expected) / (maximum - expected)
+
+            # Normalized Mutual Information
+            if ki == kj == 1:
+                nmi[i, j] = 1.0
+            else:
+                rows, columns = np.divmod(np.flatnonzero(contingency), kj)
+                mutual_information = np.sum(
+                    (nonzero / n)
+                    * np.log(nonzero * n / (sizes[i][rows] * sizes[j][columns]).astype(float))
+                )
+                if mutual_information <= 0:
+                    nmi[i, j] = 0.0
+                else:
+                    normalizer = max((entropies[i] + entropies[j]) / 2, np.finfo(float).eps)
+                    nmi[i, j] = mutual_information / normalizer
+
+            ari[j, i] = ari[i, j]
+            nmi[j, i] = nmi[i, j]
+
     return ari, nmi
 
+
+# Calculate ARI and NMI between two partitions, aligned on their shared nodes
+def calculate_partition_similarity(partition1, partition2, missing="intersect"):
+    ari, nmi = calculate_partition_similarity_matrix([partition1, partition2], missing)
+    return float(ari[0, 1]), float(nmi[0, 1])
+
 # Number of partitions
 def calculate_number_of_communities(partition):
     return len(set(partition.values()))
@@ -128,45 +368,27 @@ def calculate_community_sizes(partition):
     return sizes
 
 def visualize_communities(graph, partition, title, output_file, node_size=20):
-    # Define a set of maximally distinctive colors
-    distinct_colors = ["#E41A1C", "#377EB8", "#4DAF4A", "#FF7F00"]  # Red, Blue, Green, Orange
-    
+    from rendering import community_colors, draw_communities, legend_entries
+
     # Get unique communities and sort them
     communities = sorted(set(partition.values()))
-    num_communities = len(communities)
-
-    # Ensure we have enough colors (limit to 4)
-    if num_communities > len(distinct_colors):
-        raise ValueError(f"Too many communities ({num_communities})! Max supported is {len(distinct_colors)}.")
 
     # Assign colors to communities
-    color_map = {community: distinct_colors[i] for i, community in enumerate(communities)}
-    
-    # Assign colors to nodes
-    node_colors = [color_map[partition[node]] for node in graph.nodes()]
-
-    # Plot the graph
-    plt.figure(figsize=(12, 12))
-    # pos = nx.spring_layout(graph, seed=42)  # Spring layout for visualization
-    pos = nx.spring_layout(graph, k=0.15, seed=100)
-
-    nx.draw_networkx_nodes(graph, pos, node_color=node_colors, node_size=node_size)
-    nx.draw_networkx_edges(graph, pos, alpha=0.2, width=0.3, edge_color="gray")
-
-    # Create a legend
-    legend_handles = [plt.Line2D([0], [0], marker='o', color='w', markerfacecolor=color_map[community], markersize=10)
-                      for community in communities]
-    plt.legend(legend_handles, [f"Community {c}" for c in communities],
-               title="Communities", loc="upper right", fontsize='small', title_fontsize='medium')
+    color_map = dict(zip(communities, community_colors(len(communities))))
+    node_colors = {node: color_map[community] for node, community in partition.items()}
+
+    sizes = calculate_community_sizes(partition)
+    legend = legend_entries(
+        [f"Community {c}" for c in communities],
+        [color_map[c] for c in communities],
+        [sizes[c] for c in communities],
+    )
 
     # plt.title(title, fontsize=16)
-    plt.axis('off')
-    plt.savefig(f"visualizations/with_seed/{output_file}", format='png', dpi=300, bbox_inches='tight')
-    plt.close()
+    draw_communities(graph, node_colors, legend, f"visualizations/with_seed/{output_file}", node_size)
 
 def visualize_communities_based_on_hash(graph, partition, title, output_file, node_size=20):
-    # Fixed color palette (Red, Blue, Green, Orange)
-    distinct_colors = ["#E41A1C", "#377EB8", "#4DAF4A", "#FF7F00"]
+    from rendering import community_colors, draw_communities, legend_entries
 
     # Group nodes by community
     community_to_nodes = defaultdict(list)
@@ -174,120 +396,72 @@ def visualize_communities_based_on_hash(graph, partition, title, output_file, no
         community_to_nodes[community_id].append(node)
 
     # Use sorted node lists to uniquely identify communities
-    community_signatures = []
-    for community_nodes in community_to_nodes.values():
-        signature = tuple(sorted(community_nodes))
-        community_signatures.append(signature)
+    community_signatures = {
+        community_id: tuple(sorted(community_nodes))
+        for community_id, community_nodes in community_to_nodes.items()
+    }
 
     # Sort communities deterministically by their signature
-    community_signatures.sort()
+    ordered = sorted(community_to_nodes, key=community_signatures.get)
 
-    # Map each community signature to a fixed color
-    if len(community_signatures) > len(distinct_colors):
-        raise ValueError(f"Too many communities ({len(community_signatures)})! Max supported is {len(distinct_colors)}.")
-    
-    signature_to_color = {
-        signature: distinct_colors[i]
-        for i, signature in enumerate(community_signatures)
-    }
+    # Map each community to a fixed color by its signature rank
+    colors = community_colors(len(ordered))
+    community_id_to_color = dict(zip(ordered, colors))
+    node_colors = {node: community_id_to_color[community_id] for node, community_id in partition.items()}
 
-    # Create a mapping from original community ID to color
-    community_id_to_color = {}
-    for community_id, nodes in community_to_nodes.items():
-        signature = tuple(sorted(nodes))
-        community_id_to_color[community_id] = signature_to_color[signature]
-
-    # Assign colors to each node
-    node_colors = [community_id_to_color[partition[node]] for node in graph.nodes()]
-
-    # Plot the graph
-    plt.figure(figsize=(12, 12))
-    pos = nx.spring_layout(graph, k=0.15, seed=100)
-
-    nx.draw_networkx_nodes(graph, pos, node_color=node_colors, node_size=node_size)
-    nx.draw_networkx_edges(graph, pos, alpha=0.2, width=0.3, edge_color="gray")
-
-    # Legend (optional)
-    legend_handles = [
-        plt.Line2D([0], [0], marker='o', color='w', markerfacecolor=color, markersize=10)
-        for color in distinct_colors[:len(community_signatures)]
-    ]
-    plt.legend(
-        legend_handles,
-        [f"Community {i}" for i in range(len(community_signatures))],
-        title="Communities",
-        loc="upper right",
-        fontsize='small',
-        title_fontsize='medium'
+    legend = legend_entries(
+        [f"Community {i}" for i in range(len(ordered))],
+        colors,
+        [len(community_to_nodes[community_id]) for community_id in ordered],
     )
 
-    plt.axis('off')
-    plt.savefig(f"visualizations/with_seed_and_hash/{output_file}", format='png', dpi=300, bbox_inches='tight')
-    plt.close()
+    draw_communities(graph, node_colors, legend, f"visualizations/with_seed_and_hash/{output_file}", node_size)
 
 
 
-def calculate_modularity_density(graph, partition):
+def calculate_modularity_density(graph, partition, statistics=None):
     """
     Calculate the Modularity Density (Qd) of a partition.
 
     Parameters:
-        graph: NetworkX graph.
+        graph: NetworkX or igraph graph.
         partition: Dictionary mapping nodes to community labels.
+        statistics: Optional result of `partition_statistics` to reuse.
 
     Returns:
         Modularity density (float).
     """
-    # Group nodes by community
-    communities = defaultdict(list)
-    for node, community in partition.items():
-        communities[community].append(node)
-
-    m = graph.size(weight='weight')  # Total edge weight
-    modularity_density = 0
-
-    for community_nodes in communities.values():
-        # Subgraph for the current community
-        subgraph = graph.subgraph(community_nodes)
-        e_c = subgraph.size(weight='weight')  # Internal edge weight
-        a_c = sum(dict(graph.degree(community_nodes, weight='weight')).values()) / (2 * m)
+    statistics = statistics or partition_statistics(graph, partition)
 
-        if a_c > 0:  # Avoid division by zero
-            modularity_density += e_c / m - a_c ** 2 + (e_c / a_c)
+    m = statistics["total_weight"]  # Total edge weight
+    e_c = statistics["internal"]  # Internal edge weight
+    a_c = statistics["volume"] / (2 * m)
 
-    return modularity_density
+    nonzero = a_c > 0  # Avoid division by zero
+    return float(np.sum(e_c[nonzero] / m - a_c[nonzero] ** 2 + e_c[nonzero] / a_c[nonzero]))
 
-def calculate_conductance(graph, partition):
+def calculate_conductance(graph, partition, statistics=None):
     """
     Calculate the conductance for each community in a graph partition.
 
     Parameters:
-        graph: NetworkX graph.
+        graph: NetworkX or igraph graph.
         partition: Dictionary mapping nodes to community labels.
+        statistics: Optional result of `partition_statistics` to reuse.
 
     Returns:
         Dictionary of conductance values for each community.
     """
-    # Group nodes by community
-    communities = defaultdict(list)
-    for node, community in partition.items():
-        communities[community].append(node)
+    statistics = statistics or partition_statistics(graph, partition)
+    m = statistics["total_weight"]
 
     conductance_scores = {}
-    for community_label, community_nodes in communities.items():
-        # Subgraph for the community
-        subgraph = graph.subgraph(community_nodes)
-        internal_edges = subgraph.size(weight='weight')  # Internal edge weight
-
-        # Total degree of community nodes
-        total_degree = sum(dict(graph.degree(community_nodes, weight='weight')).values())
-
-        # Boundary edges (edges crossing the community boundary)
-        boundary_edges = total_degree - 2 * internal_edges
-
+    for community_label, total_degree, boundary_edges in zip(
+        statistics["labels"], statistics["volume"].tolist(), statistics["cut"].tolist()
+    ):
         # Conductance calculation
         if total_degree > 0:
-            conductance_scores[community_label] = boundary_edges / min(total_degree, graph.size(weight='weight') - total_degree)
+            conductance_scores[community_label] = boundary_edges / min(total_degree, m - total_degree)
         else:
             conductance_scores[community_label] = 0
 
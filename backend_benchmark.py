@@ -0,0 +1,122 @@
+import time
+
+import numpy as np
+
+from mongodbDriver import MongoDBManager
+from inferenceBackends import BACKENDS, load_sentence_encoder, load_summarizer
+from summarizationMetrics import SummarizationMetrics
+
+# Fixed corpus: the first CORPUS_SIZE completed instances by _id
+CORPUS_SIZE = 100
+NUM_THREADS = None
+SUMMARIZER_BATCH_SIZE = 8
+
+
+def load_corpus(corpus_size):
+    db_manager = MongoDBManager(
+        host="localhost",
+        port=27017,
+        username="admin",
+        password="password",
+        database_name="mastodon-analysis",
+    )
+    try:
+        db_manager.connect()
+
+        db = db_manager.get_database()
+        collection = db["instances"]
+
+        documents = list(
+            collection.find(
+                {"summarization_status": "COMPLETED"},
+                {"original_content", "summarization_text"},
+            )
+            .sort("_id", 1)
+            .limit(corpus_size)
+        )
+    finally:
+        db_manager.close()
+
+    posts = []
+    for document in documents:
+        for status in document["original_content"][:10]:
+            if status["detected_language"] == "en":
+                posts.append(status["content"])
+            else:
+                posts.append(status["libretranslate_translation"])
+    summaries = [document["summarization_text"] for document in documents]
+    return posts, summaries
+
+
+def benchmark_summarizer(posts, metrics_engine):
+    print("\n===== Summarizer (facebook/bart-large-cnn) =====")
+    print(f"{'backend':>10} {'posts/s':>8} {'rougeL':>8} {'bert f1':>8}")
+
+    baseline = None
+    for backend in BACKENDS:
+        try:
+            summarizer = load_summarizer(backend=backend, num_threads=NUM_THREADS)
+        except ImportError as e:
+            print(f"{backend:>10} skipped: {e}")
+            continue
+
+        start = time.perf_counter()
+        outputs = summarizer(
+            posts,
+            max_length=75,
+            min_length=25,
+            do_sample=False,
+            truncation=True,
+            batch_size=SUMMARIZER_BATCH_SIZE,
+        )
+        elapsed = time.perf_counter() - start
+        summaries = [output["summary_text"] for output in outputs]
+
+        if baseline is None:
+            baseline = summaries
+
+        # Agreement with the fp32 summaries
+        results, _ = metrics_engine.score(baseline, summaries)
+        rouge_l = np.mean([r["rouge"]["rougeL"] for r in results])
+        bert_f1 = np.mean([r["bertscore"]["f1"] for r in results])
+        print(f"{backend:>10} {len(posts) / elapsed:>8.2f} {rouge_l:>8.4f} {bert_f1:>8.4f}")
+
+
+def benchmark_encoder(summaries):
+    print("\n===== Encoder (all-MiniLM-L6-v2) =====")
+    print(f"{'backend':>10} {'texts/s':>8} {'mean drift':>10} {'max drift':>10}")
+
+    baseline = None
+    for backend in BACKENDS:
+        try:
+            encoder = load_sentence_encoder(backend=backend, num_threads=NUM_THREADS)
+        except ImportError as e:
+            print(f"{backend:>10} skipped: {e}")
+            continue
+
+        start = time.perf_counter()
+        embeddings = encoder.encode(summaries, normalize_embeddings=True)
+        elapsed = time.perf_counter() - start
+
+        if baseline is None:
+            baseline = embeddings
+
+        # Cosine drift from the fp32 embeddings
+        drift = 1 - np.sum(baseline * embeddings, axis=1)
+        print(
+            f"{backend:>10} {len(summaries) / elapsed:>8.2f} "
+            f"{drift.mean():>10.6f} {drift.max():>10.6f}"
+        )
+
+
+def main():
+    posts, summaries = load_corpus(CORPUS_SIZE)
+    print(f"Corpus: {len(posts)} posts, {len(summaries)} summaries")
+
+    metrics_engine = SummarizationMetrics(model_type="roberta-large", lang="en")
+    benchmark_summarizer(posts, metrics_engine)
+    benchmark_encoder(summaries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import numpy as np
+from bson.binary import Binary
+
+
+def encode_vectors(matrix, dtype="float32"):
+    """
+    Pack embedding rows as BSON Binary.
+
+    Args:
+        matrix (np.ndarray): One embedding per row.
+        dtype (str): `float32` or `float16` (default: float32).
+
+    Returns:
+        list: One Binary value per row.
+    """
+    packed = np.ascontiguousarray(matrix, dtype=dtype)
+    return [Binary(row.tobytes()) for row in packed]
+
+
+def decode_vectors(values, dtypes=None):
+    """
+    Decode stored embeddings straight into a float32 matrix.
+
+    Accepts packed Binary values and the older list-of-floats format.
+
+    Args:
+        values (list): Stored embeddings, one per document.
+        dtypes (list): Storage dtype of each packed value (default: all float32).
+
+    Returns:
+        np.ndarray: Matrix with one embedding per row.
+    """
+    if not values:
+        return np.empty((0, 0), dtype=np.float32)
+
+    rows = []
+    for i, value in enumerate(values):
+        if isinstance(value, (bytes, Binary)):
+            dtype = dtypes[i] if dtypes else "float32"
+            rows.append(np.frombuffer(value, dtype=dtype))
+        else:
+            rows.append(np.asarray(value, dtype=np.float32))
+    return np.vstack(rows).astype(np.float32, copy=False)
+
+
+def load_embeddings(documents, field="sbert_embedding"):
+    """
+    Decode the embeddings of MongoDB documents that have one.
+
+    Args:
+        documents (list): Documents with `name`, `field` and optionally `{field}_dtype`.
+        field (str): Embedding field (default: sbert_embedding).
+
+    Returns:
+        list: Instance names.
+        np.ndarray: Matrix whose rows follow the names.
+    """
+    documents = [doc for doc in documents if field in doc]
+    names = [doc["name"] for doc in documents]
+    matrix = decode_vectors(
+        [doc[field] for doc in documents],
+        [doc.get(f"{field}_dtype", "float32") for doc in documents],
+    )
+    return names, matrix
@@ -0,0 +1,69 @@
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+
+def textrank_scores(similarity, damping=0.85, max_iter=100, tol=1e-6):
+    """
+    TextRank centrality of every sentence from a sentence similarity matrix.
+
+    Returns:
+        np.ndarray: One score per sentence, summing to 1.
+    """
+    n = similarity.shape[0]
+    weights = similarity.copy()
+    np.fill_diagonal(weights, 0)
+    row_sums = weights.sum(axis=1, keepdims=True)
+    # Sentences without any similar sentence spread their rank uniformly
+    transition = np.where(row_sums > 0, weights / np.where(row_sums > 0, row_sums, 1), 1 / n)
+
+    scores = np.full(n, 1 / n)
+    for _ in range(max_iter):
+        updated = (1 - damping) / n + damping * transition.T @ scores
+        if np.abs(updated - scores).sum() < tol:
+            return updated
+        scores = updated
+    return scores
+
+
+def select_sentences(sentences, token_counts, token_budget, redundancy_threshold=0.5):
+    """
+    Pick the most central, non-redundant sentences that fit in a token budget.
+
+    Sentences are ranked by TextRank over TF-IDF cosine similarity and taken
+    greedily, skipping any sentence too similar to one already chosen.
+
+    Args:
+        sentences (list): Candidate sentences.
+        token_counts (list): Token count of each sentence.
+        token_budget (int): Maximum total tokens of the selection.
+        redundancy_threshold (float): Cosine similarity above which a sentence
+            counts as a near-duplicate (default: 0.5).
+
+    Returns:
+        list: Indices of the selected sentences, in their original order.
+    """
+    if not sentences:
+        return []
+
+    try:
+        tfidf = TfidfVectorizer().fit_transform(sentences)
+    except ValueError:
+        # Only stop words or punctuation: nothing to rank on
+        return []
+    similarity = (tfidf @ tfidf.T).toarray()
+    scores = textrank_scores(similarity)
+
+    selected = []
+    used = 0
+    for i in np.argsort(-scores):
+        # Sentences without any TF-IDF term carry no content
+        if similarity[i, i] == 0:
+            continue
+        if used + token_counts[i] > token_budget:
+            continue
+        if selected and similarity[i, selected].max() > redundancy_threshold:
+            continue
+        selected.append(int(i))
+        used += token_counts[i]
+
+    return sorted(selected)
@@ -0,0 +1,103 @@
+import torch
+from sentence_transformers import SentenceTransformer
+from transformers import AutoModelForSeq2SeqLM, AutoTokenizer, pipeline
+
+# Backends selectable per stage
+BACKENDS = ("pytorch", "quantized", "onnx")
+
+
+def _check_backend(backend):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}'. Choose one of {BACKENDS}.")
+
+
+def _set_threads(num_threads):
+    if num_threads:
+        torch.set_num_threads(num_threads)
+
+
+def load_summarizer(model_name="facebook/bart-large-cnn", backend="pytorch", num_threads=None):
+    """
+    Load a summarization pipeline on the requested CPU backend.
+
+    Args:
+        model_name (str): Hugging Face model (default: facebook/bart-large-cnn).
+        backend (str): `pytorch` (fp32), `quantized` (torch dynamic int8 on Linear
+            layers) or `onnx` (ONNX Runtime through optimum) (default: pytorch).
+        num_threads (int): Intra-op threads for torch (default: None, library default).
+
+    Returns:
+        transformers.Pipeline: Summarization pipeline.
+    """
+    _check_backend(backend)
+    _set_threads(num_threads)
+
+    if backend == "pytorch":
+        return pipeline("summarization", model=model_name)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    if backend == "quantized":
+        model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+        model = torch.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    else:
+        try:
+            import onnxruntime
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        except ImportError as e:
+            raise ImportError(
+                "The onnx backend requires `optimum[onnxruntime]` to be installed."
+            ) from e
+
+        session_options = onnxruntime.SessionOptions()
+        if num_threads:
+            session_options.intra_op_num_threads = num_threads
+        model = ORTModelForSeq2SeqLM.from_pretrained(
+            model_name, export=True, session_options=session_options
+        )
+
+    return pipeline("summarization", model=model, tokenizer=tokenizer)
+
+
+def load_sentence_encoder(model_name="all-MiniLM-L6-v2", backend="pytorch", num_threads=None):
+    """
+    Load a SentenceTransformer on the requested CPU backend.
+
+    Args:
+        model_name (str): SentenceTransformer model (default: all-MiniLM-L6-v2).
+        backend (str): `pytorch` (fp32), `quantized` (torch dynamic int8 on Linear
+            layers) or `onnx` (sentence-transformers ONNX backend) (default: pytorch).
+        num_threads (int): Intra-op threads for torch (default: None, library default).
+
+    Returns:
+        SentenceTransformer: Encoder with the usual `encode` API.
+    """
+    _check_backend(backend)
+    _set_threads(num_threads)
+
+    if backend == "pytorch":
+        return SentenceTransformer(model_name)
+
+    if backend == "quantized":
+        model = SentenceTransformer(model_name, device="cpu")
+        return torch.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+
+    try:
+        import onnxruntime
+        import optimum.onnxruntime  # noqa: F401
+    except ImportError as e:
+        raise ImportError(
+            "The onnx backend requires `optimum[onnxruntime]` to be installed."
+        ) from e
+
+    model_kwargs = {}
+    if num_threads:
+        session_options = onnxruntime.SessionOptions()
+        session_options.intra_op_num_threads = num_threads
+        model_kwargs["session_options"] = session_options
+    return SentenceTransformer(
+        model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs
+    )
@@ -0,0 +1,180 @@
+import numpy as np
+
+from mongodbDriver import MongoDBManager
+from embeddingStorage import load_embeddings
+
+
+def _normalize(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms > 0, norms, 1)
+
+
+class InstanceIndex:
+    def __init__(self, dim=384, backend="exact", block_size=1024, ef_construction=200, M=16, ef=100):
+        """
+        Initialize a cosine-similarity index over instance embeddings.
+
+        Args:
+            dim (int): Embedding dimension (default: 384).
+            backend (str): `exact` (blocked numpy) or `hnsw` (hnswlib) (default: exact).
+            block_size (int): Queries scored per matrix product in the exact backend (default: 1024).
+            ef_construction (int): HNSW build-time accuracy (default: 200).
+            M (int): HNSW graph degree (default: 16).
+            ef (int): HNSW query-time accuracy (default: 100).
+        """
+        if backend not in ("exact", "hnsw"):
+            raise ValueError(f"Unknown backend '{backend}'. Choose 'exact' or 'hnsw'.")
+
+        self.dim = dim
+        self.backend = backend
+        self.block_size = block_size
+        self.names = []
+        self.name_to_row = {}
+        self.vectors = np.empty((0, dim), dtype=np.float32)
+
+        self.hnsw = None
+        if backend == "hnsw":
+            try:
+                import hnswlib
+            except ImportError as e:
+                raise ImportError("The hnsw backend requires `hnswlib` to be installed.") from e
+
+            self.hnsw = hnswlib.Index(space="cosine", dim=dim)
+            self.hnsw.init_index(max_elements=1024, ef_construction=ef_construction, M=M)
+            self.hnsw.set_ef(ef)
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, names, vectors):
+        """
+        Add instances to the index, replacing the vector of names already present.
+
+        Args:
+            names (list): Instance names.
+            vectors (np.ndarray): One embedding per name.
+        """
+        vectors = _normalize(vectors)
+        new_rows = []
+        for name, vector in zip(names, vectors):
+            if name in self.name_to_row:
+                self.vectors[self.name_to_row[name]] = vector
+            else:
+                self.name_to_row[name] = len(self.names)
+                self.names.append(name)
+                new_rows.append(vector)
+        if new_rows:
+            self.vectors = np.vstack([self.vectors, np.vstack(new_rows)])
+
+        if self.hnsw is not None:
+            rows = np.array([self.name_to_row[name] for name in names], dtype=np.int64)
+            if len(self.names) > self.hnsw.get_max_elements():
+                self.hnsw.resize_index(max(len(self.names), 2 * self.hnsw.get_max_elements()))
+            self.hnsw.add_items(vectors, rows, replace_deleted=False)
+
+    def _search(self, queries, k):
+        """Return (rows, scores) of the k most similar instances for each query row."""
+        k = min(k, len(self.names))
+        if self.hnsw is not None:
+            rows, distances = self.hnsw.knn_query(queries, k=k)
+            return rows.astype(np.int64), 1 - distances
+
+        all_rows = np.empty((len(queries), k), dtype=np.int64)
+        all_scores = np.empty((len(queries), k), dtype=np.float32)
+        for start in range(0, len(queries), self.block_size):
+            block = queries[start : start + self.block_size] @ self.vectors.T
+            top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(block, top, axis=1)
+            order = np.argsort(-top_scores, axis=1)
+            all_rows[start : start + len(block)] = np.take_along_axis(top, order, axis=1)
+            all_scores[start : start + len(block)] = np.take_along_axis(top_scores, order, axis=1)
+        return all_rows, all_scores
+
+    def query(self, vectors, k=10):
+        """
+        Find the k most similar instances to each query embedding.
+
+        Returns:
+            list: One list of (name, cosine_similarity) per query, best first.
+        """
+        if not self.names:
+            return [[] for _ in range(len(_normalize(vectors)))]
+        rows, scores = self._search(_normalize(vectors), k)
+        return [
+            [(self.names[r], float(s)) for r, s in zip(row, score)]
+            for row, score in zip(rows, scores)
+        ]
+
+    def similar_to(self, name, k=10):
+        """Instances that talk about the same things as `name`, excluding itself."""
+        vector = self.vectors[self.name_to_row[name]]
+        return [
+            (other, score) for other, score in self.query(vector, k + 1)[0] if other != name
+        ][:k]
+
+    def knn_graph(self, k=10):
+        """
+        Build the k-nearest-neighbour graph over all indexed instances.
+
+        Returns:
+            list: Undirected (name1, name2, cosine_similarity) edges, each pair once.
+        """
+        if not self.names:
+            return []
+        rows, scores = self._search(self.vectors, k + 1)
+        edges = {}
+        for i, (row, score) in enumerate(zip(rows, scores)):
+            for j, s in zip(row, score):
+                if i == j:
+                    continue
+                edges[(min(i, j), max(i, j))] = float(s)
+        return [(self.names[i], self.names[j], s) for (i, j), s in edges.items()]
+
+    def write_edgelist(self, output_file, k=10):
+        """Write the k-NN graph in the weighted edgelist format read by `load_weighted_graph`."""
+        with open(output_file, "w") as outfile:
+            for name1, name2, sim_score in self.knn_graph(k):
+                outfile.write(f"{name1} {name2} {sim_score:.4f}\n")
+
+
+def load_index(backend="exact"):
+    """Build an InstanceIndex from the `sbert_embedding` fields in MongoDB."""
+    db_manager = MongoDBManager(
+        host="localhost",
+        port=27017,
+        username="admin",
+        password="password",
+        database_name="mastodon-analysis",
+    )
+    try:
+        db_manager.connect()
+
+        db = db_manager.get_database()
+        collection = db["instances"]
+
+        documents = list(
+            collection.find(
+                {"sbert_embedding": {"$exists": True}},
+                {"name": 1, "sbert_embedding": 1, "sbert_embedding_dtype": 1},
+            )
+        )
+    finally:
+        db_manager.close()
+
+    names, embeddings = load_embeddings(documents)
+    index = InstanceIndex(dim=embeddings.shape[1] if len(names) else 384, backend=backend)
+    index.add(names, embeddings)
+    return index
+
+
+if __name__ == "__main__":
+    index = load_index()
+    print(f"Indexed {len(index)} instances")
+
+    # k-NN similarity graph, readable by analysis/utils.load_weighted_graph
+    output_file = "edgelist_knn_weighted.txt"
+    index.write_edgelist(output_file, k=10)
+    print(f"k-NN edgelist written to: {output_file}")
@@ -0,0 +1,117 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from nltk.corpus import wordnet
+from nltk.tokenize import word_tokenize
+from nltk.translate.bleu_score import sentence_bleu, SmoothingFunction
+from nltk.translate.meteor_score import single_meteor_score
+
+# Use a smoothing function to handle brevity penalties in short sentences
+smoothing_function = SmoothingFunction().method1
+
+
+def _init_worker():
+    # Load WordNet once per worker instead of lazily inside the first METEOR call
+    wordnet.ensure_loaded()
+    wordnet.synsets("warmup")
+
+
+def score_pair(source_text, back_translation, timings=None):
+    """
+    Calculate BLEU and METEOR of a back translation against its source text.
+
+    Args:
+        source_text (str): Original post.
+        back_translation (str): Round-trip translation of the post.
+        timings (dict): Optional dict accumulating seconds spent in
+            `tokenize`, `bleu` and `meteor`.
+
+    Returns:
+        dict: Rounded `bleu` and `meteor` scores.
+    """
+    start = time.perf_counter()
+    # Tokenize once (BLEU and METEOR in nltk both require tokenized inputs)
+    source_tokens = word_tokenize(source_text)
+    back_translation_tokens = word_tokenize(back_translation)
+    tokenized = time.perf_counter()
+
+    bleu_score = sentence_bleu(
+        [source_tokens],  # Reference (source text)
+        back_translation_tokens,  # Hypothesis (back translation)
+        smoothing_function=smoothing_function,
+    )
+    bleu_done = time.perf_counter()
+
+    meteor = single_meteor_score(source_tokens, back_translation_tokens)
+    meteor_done = time.perf_counter()
+
+    if timings is not None:
+        timings["tokenize"] += tokenized - start
+        timings["bleu"] += bleu_done - tokenized
+        timings["meteor"] += meteor_done - bleu_done
+
+    return {
+        "bleu": round(bleu_score, 4),
+        "meteor": round(meteor, 4),
+    }
+
+
+def score_chunk(pairs):
+    """Score a chunk of (source_text, back_translation) pairs and report where the time went."""
+    timings = {"tokenize": 0.0, "bleu": 0.0, "meteor": 0.0}
+    scores = [score_pair(source, back, timings) for source, back in pairs]
+    return scores, timings
+
+
+class LexicalScoringPool:
+    def __init__(self, max_workers=None, chunk_size=256, start_method=None):
+        """
+        Initialize a process pool that computes BLEU and METEOR off the main process.
+
+        Workers are not forked from the caller, which may already run torch
+        threads, so the calling script is imported again in every worker and
+        must not load models at import time.
+
+        Args:
+            max_workers (int): Number of worker processes (default: os.cpu_count()).
+            chunk_size (int): Number of pairs scored per task (default: 256).
+            start_method (str): multiprocessing start method (default: "forkserver"
+                where available, else "spawn").
+        """
+        self.chunk_size = chunk_size
+        if start_method is None:
+            available = multiprocessing.get_all_start_methods()
+            start_method = "forkserver" if "forkserver" in available else "spawn"
+        self.executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context(start_method),
+            initializer=_init_worker,
+        )
+
+    def submit(self, pairs):
+        """
+        Queue `pairs` for scoring and return immediately.
+
+        Returns:
+            list: Futures, one per chunk, in input order.
+        """
+        return [
+            self.executor.submit(score_chunk, pairs[start : start + self.chunk_size])
+            for start in range(0, len(pairs), self.chunk_size)
+        ]
+
+    @staticmethod
+    def collect(futures, timings):
+        """Wait for `futures` and return their scores in order, adding worker timings into `timings`."""
+        scores = []
+        for future in futures:
+            chunk_scores, chunk_timings = future.result()
+            scores.extend(chunk_scores)
+            for key, value in chunk_timings.items():
+                timings[key] += value
+        return scores
+
+    def close(self):
+        """Shut the worker processes down."""
+        self.executor.shutdown()
@@ -0,0 +1,176 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class LibreTranslateClient:
+    def __init__(
+        self,
+        url="http://localhost:5000/translate",
+        batch_size=16,
+        max_workers=4,
+        timeout=300,
+        cache=None,
+    ):
+        """
+        Initialize the LibreTranslateClient with connection parameters.
+
+        Args:
+            url (str): LibreTranslate /translate endpoint (default: localhost:5000).
+            batch_size (int): Number of texts sent per request in the `q` array (default: 16).
+            max_workers (int): Number of concurrent requests in flight (default: 4).
+            timeout (int): Per-request timeout in seconds (default: 300).
+            cache (TranslationCache): Optional cache consulted before each request (default: None).
+        """
+        self.url = url
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.cache = cache
+
+        # One pooled session shared by all worker threads
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def translate_batch(self, texts, source, target):
+        """
+        Translate a list of texts sharing the same language pair in a single request.
+
+        Texts found in the cache are not sent; fresh translations are written back.
+        When the batched request fails, its texts are retried one by one, so
+        only the texts that fail on their own get an error.
+
+        Returns:
+            tuple: (list of translations, None where a text failed;
+                list of error texts, None where a text succeeded).
+        """
+        translated = [None] * len(texts)
+        errors = [None] * len(texts)
+        if self.cache is not None:
+            for i, text in enumerate(texts):
+                translated[i] = self.cache.get(text, source, target)
+
+        missing = [i for i, translation in enumerate(translated) if translation is None]
+        if not missing:
+            return translated, errors
+
+        fetched, error = self._post([texts[i] for i in missing], source, target)
+        if error is not None:
+            if len(missing) == 1:
+                errors[missing[0]] = error
+                return translated, errors
+            print("Batch error, retrying texts one by one:", error)
+            fetched = []
+            for i in missing:
+                single, error = self._post([texts[i]], source, target)
+                fetched.append(single[0] if error is None else None)
+                errors[i] = error
+
+        succeeded = [(i, translation) for i, translation in zip(missing, fetched) if translation is not None]
+        for i, translation in succeeded:
+            translated[i] = translation
+        if self.cache is not None and succeeded:
+            self.cache.put_many(
+                [texts[i] for i, _ in succeeded], [translation for _, translation in succeeded],
+                source, target,
+            )
+        return translated, errors
+
+    def _post(self, texts, source, target):
+        data = {"q": texts, "source": source, "target": target}
+        try:
+            response = self.session.post(self.url, json=data, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            return None, f"Request error: {str(e)}"
+
+        if response.status_code != 200:
+            return None, response.text
+
+        try:
+            translated = response.json()["translatedText"]
+        except (ValueError, KeyError, TypeError) as e:
+            return None, f"Invalid response ({e}): {response.text[:200]}"
+        if isinstance(translated, str):
+            translated = [translated]
+        if len(translated) != len(texts):
+            return None, f"Expected {len(texts)} translations, got {len(translated)}"
+        return translated, None
+
+    def _batches(self, indices, texts, source, target):
+        for start in range(0, len(indices), self.batch_size):
+            chunk = indices[start : start + self.batch_size]
+            yield chunk, [texts[i] for i in chunk], source, target
+
+    def translate_with_round_trip(self, items, pivot="en"):
+        """
+        Translate every (text, source) item into `pivot` and back again.
+
+        Items are grouped by source language and sent as batched arrays. Round-trip
+        batches are submitted as soon as their forward batch completes, so both
+        phases share the same worker pool and the server stays busy.
+
+        Args:
+            items (list): List of (text, source_language) tuples.
+            pivot (str): Target language of the forward translation (default: en).
+
+        Returns:
+            list: One dict per item, in input order, with `translation`,
+                `round_trip` and `status` (SUCCESS, ERROR_TRANSLATE or ERROR_ROUNDTRIP).
+        """
+        texts = [text for text, _ in items]
+        results = [
+            {"translation": "", "round_trip": "", "status": "SUCCESS"} for _ in items
+        ]
+
+        by_language = defaultdict(list)
+        for i, (_, source) in enumerate(items):
+            by_language[source].append(i)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            forward_futures = {}
+            for source, indices in by_language.items():
+                for chunk, batch, src, tgt in self._batches(indices, texts, source, pivot):
+                    future = executor.submit(self.translate_batch, batch, src, tgt)
+                    forward_futures[future] = (chunk, source)
+
+            round_trip_futures = {}
+            for future in as_completed(forward_futures):
+                chunk, source = forward_futures[future]
+                translated, errors = future.result()
+                succeeded = []
+                for i, translation, error in zip(chunk, translated, errors):
+                    if error is not None:
+                        print("Error:", error)
+                        results[i]["translation"] = error
+                        results[i]["status"] = "ERROR_TRANSLATE"
+                    else:
+                        results[i]["translation"] = translation
+                        succeeded.append(i)
+                if not succeeded:
+                    continue
+
+                round_trip = executor.submit(
+                    self.translate_batch, [results[i]["translation"] for i in succeeded], pivot, source
+                )
+                round_trip_futures[round_trip] = succeeded
+
+            for future in as_completed(round_trip_futures):
+                chunk = round_trip_futures[future]
+                translated, errors = future.result()
+                for i, round_trip, error in zip(chunk, translated, errors):
+                    if error is not None:
+                        print("Error:", error)
+                        results[i]["round_trip"] = error
+                        results[i]["status"] = "ERROR_ROUNDTRIP"
+                    else:
+                        results[i]["round_trip"] = round_trip
+
+        return results
+
+    def close(self):
+        """Close the pooled HTTP session."""
+        self.session.close()
@@ -0,0 +1,124 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class LibreTranslateStub:
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=5001,
+        latency_per_char=0.0001,
+        base_latency=0.005,
+        max_concurrency=4,
+        error_rate=0.0,
+        seed=None,
+    ):
+        """
+        Initialize a lightweight stand-in for the LibreTranslate /translate endpoint.
+
+        The "translation" is the input text tagged with the target language, which
+        keeps round trips deterministic while exercising the same request contract.
+
+        Args:
+            host (str): Interface to bind (default: 127.0.0.1).
+            port (int): Port to bind (default: 5001).
+            latency_per_char (float): Seconds of simulated work per input character (default: 0.0001).
+            base_latency (float): Fixed seconds of simulated work per request (default: 0.005).
+            max_concurrency (int): Requests processed at once; the rest queue (default: 4).
+            error_rate (float): Probability of answering a request with HTTP 500 (default: 0.0).
+            seed (int): Seed for the error injection RNG (default: None).
+        """
+        self.host = host
+        self.port = port
+        self.latency_per_char = latency_per_char
+        self.base_latency = base_latency
+        self.error_rate = error_rate
+        self.slots = threading.Semaphore(max_concurrency)
+        self.random = random.Random(seed)
+        self.server = None
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/translate"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path != "/translate":
+                    self._reply(404, {"error": "Not Found"})
+                    return
+
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    data = json.loads(self.rfile.read(length))
+                    q, source, target = data["q"], data["source"], data["target"]
+                except (ValueError, KeyError):
+                    self._reply(400, {"error": "Invalid request"})
+                    return
+
+                texts = q if isinstance(q, list) else [q]
+                with stub.slots:
+                    time.sleep(
+                        stub.base_latency
+                        + stub.latency_per_char * sum(len(t) for t in texts)
+                    )
+                    if stub.random.random() < stub.error_rate:
+                        self._reply(500, {"error": "Injected failure"})
+                        return
+
+                translated = [f"[{source}->{target}] {t}" for t in texts]
+                self._reply(
+                    200,
+                    {"translatedText": translated if isinstance(q, list) else translated[0]},
+                )
+
+            def _reply(self, status_code, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status_code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _bind(self):
+        self.server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self.server.daemon_threads = True
+
+    def serve_forever(self):
+        """Serve requests from the calling thread until interrupted."""
+        self._bind()
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+
+    def start(self):
+        """Serve requests from a background thread."""
+        self._bind()
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Shut the server down."""
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+            self.thread = None
+
+
+if __name__ == "__main__":
+    stub = LibreTranslateStub(port=5000)
+    print(f"LibreTranslate stub listening on {stub.url}")
+    stub.serve_forever()
@@ -0,0 +1,159 @@
+import bisect
+
+from nltk.tokenize import sent_tokenize
+
+
+class BatchedSummarizer:
+    def __init__(self, summarizer, batch_size=8):
+        """
+        Initialize the BatchedSummarizer around a Hugging Face summarization pipeline.
+
+        Args:
+            summarizer: `transformers` summarization pipeline.
+            batch_size (int): Number of texts per forward pass (default: 8).
+        """
+        self.summarizer = summarizer
+        self.batch_size = batch_size
+
+    @property
+    def max_input_tokens(self):
+        """Longest input the model accepts, excluding its special tokens."""
+        tokenizer = self.summarizer.tokenizer
+        return min(tokenizer.model_max_length, 1024) - tokenizer.num_special_tokens_to_add()
+
+    def tokenize(self, texts):
+        """
+        Tokenize texts once with the model's own tokenizer.
+
+        Returns:
+            list: Character offsets of every token, one list per text. Their
+                length is the text's token count.
+        """
+        if not texts:
+            return []
+        return self.summarizer.tokenizer(
+            texts, add_special_tokens=False, return_offsets_mapping=True
+        )["offset_mapping"]
+
+    def chunk(self, text, offsets, max_tokens=None, overlap_tokens=64):
+        """
+        Split a tokenized text into overlapping chunks that end at sentence boundaries.
+
+        Args:
+            text (str): Text to split.
+            offsets (list): Token character offsets from `tokenize`.
+            max_tokens (int): Longest chunk in tokens (default: `max_input_tokens`).
+            overlap_tokens (int): Tokens of context repeated at the start of the
+                next chunk, rounded to a sentence boundary (default: 64).
+
+        Returns:
+            list: (chunk_text, token_count) tuples covering the whole input.
+        """
+        max_tokens = max_tokens or self.max_input_tokens
+        n = len(offsets)
+        if n <= max_tokens:
+            return [(text, n)]
+
+        # Token index at which each sentence after the first starts
+        token_starts = [start for start, _ in offsets]
+        boundaries = []
+        position = 0
+        for sentence in sent_tokenize(text):
+            found = text.find(sentence, position)
+            if found < 0:
+                continue
+            position = found
+            index = bisect.bisect_left(token_starts, position)
+            if 0 < index < n:
+                boundaries.append(index)
+            position += len(sentence)
+
+        chunks = []
+        start = 0
+        while start < n:
+            end = min(start + max_tokens, n)
+            if end < n:
+                # Cut at the last sentence boundary that fits, or hard-cut a run-on sentence
+                i = bisect.bisect_right(boundaries, end) - 1
+                if i >= 0 and boundaries[i] > start:
+                    end = boundaries[i]
+            chunks.append((text[offsets[start][0] : offsets[end - 1][1]], end - start))
+            if end >= n:
+                break
+
+            # Start the next chunk at a sentence boundary inside the overlap window
+            i = bisect.bisect_left(boundaries, end - overlap_tokens)
+            if i < len(boundaries) and start < boundaries[i] < end:
+                start = boundaries[i]
+            else:
+                start = end
+        return chunks
+
+    def reduce(self, groups, max_length, min_length, overlap_tokens=64):
+        """
+        Summarize each group of chunk summaries into one summary.
+
+        A group's joined summaries that are still longer than the model input
+        are chunked and summarized again, until every group fits in one pass.
+
+        Args:
+            groups (list): Lists of chunk summaries, one list per text.
+
+        Returns:
+            list: One summary per group, in input order.
+        """
+        joined = ["\n".join(group) for group in groups]
+        offsets = self.tokenize(joined)
+        while True:
+            over_length = [i for i, o in enumerate(offsets) if len(o) > self.max_input_tokens]
+            if not over_length:
+                break
+            chunks = {
+                i: self.chunk(joined[i], offsets[i], overlap_tokens=overlap_tokens) for i in over_length
+            }
+            pieces = [piece for i in over_length for piece in chunks[i]]
+            summaries = iter(
+                self.summarize(
+                    [piece for piece, _ in pieces],
+                    max_length=max_length,
+                    min_length=min_length,
+                    lengths=[count for _, count in pieces],
+                )
+            )
+            for i in over_length:
+                joined[i] = "\n".join(next(summaries) for _ in chunks[i])
+            reduced = self.tokenize([joined[i] for i in over_length])
+            for i, o in zip(over_length, reduced):
+                offsets[i] = o
+        return self.summarize(joined, max_length, min_length, lengths=[len(o) for o in offsets])
+
+    def summarize(self, texts, max_length, min_length, lengths=None):
+        """
+        Summarize many texts, batching texts of similar token length together.
+
+        Texts are sorted by tokenized length so each batch is padded only to its
+        own longest member. Pass `lengths` when the token counts are already known.
+
+        Returns:
+            list: One summary per text, in input order.
+        """
+        if not texts:
+            return []
+
+        if lengths is None:
+            tokenizer = self.summarizer.tokenizer
+            lengths = [len(ids) for ids in tokenizer(texts)["input_ids"]]
+        order = sorted(range(len(texts)), key=lambda i: lengths[i])
+
+        outputs = self.summarizer(
+            [texts[i] for i in order],
+            max_length=max_length,
+            min_length=min_length,
+            do_sample=False,
+            batch_size=self.batch_size,
+        )
+
+        summaries = [None] * len(texts)
+        for i, output in zip(order, outputs):
+            summaries[i] = output["summary_text"]
+        return summaries
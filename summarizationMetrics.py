@@ -0,0 +1,52 @@
+import time
+
+import evaluate
+from bert_score import BERTScorer
+
+
+class SummarizationMetrics:
+    def __init__(self, model_type="roberta-large", lang="en", batch_size=64):
+        """
+        Initialize the SummarizationMetrics engine, loading BERTScore and ROUGE once.
+
+        Args:
+            model_type (str): BERTScore model (default: roberta-large).
+            lang (str): Language of the summaries (default: en).
+            batch_size (int): BERTScore batch size (default: 64).
+        """
+        self.bert_scorer = BERTScorer(model_type=model_type, lang=lang, batch_size=batch_size)
+        self.rouge_metric = evaluate.load("rouge")
+
+    def score(self, references, candidates):
+        """
+        Score every (reference, candidate) pair in one BERTScore and one ROUGE call.
+
+        Returns:
+            list: One {"bertscore": ..., "rouge": ...} dict per pair.
+            dict: Seconds spent in `bertscore` and `rouge` for this batch.
+        """
+        start = time.perf_counter()
+        P, R, F1 = self.bert_scorer.score(candidates, references)
+        bertscore_done = time.perf_counter()
+        rouge_scores = self.rouge_metric.compute(
+            predictions=candidates, references=references, use_aggregator=False
+        )
+        rouge_done = time.perf_counter()
+
+        results = []
+        for i in range(len(candidates)):
+            results.append(
+                {
+                    "bertscore": {
+                        "precision": P[i].item(),
+                        "recall": R[i].item(),
+                        "f1": F1[i].item(),
+                    },
+                    "rouge": {key: float(values[i]) for key, values in rouge_scores.items()},
+                }
+            )
+        timings = {
+            "bertscore": bertscore_done - start,
+            "rouge": rouge_done - bertscore_done,
+        }
+        return results, timings
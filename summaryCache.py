@@ -0,0 +1,111 @@
+import hashlib
+import json
+import sqlite3
+
+from translationCache import text_hash
+
+
+def inputs_hash(texts, config=""):
+    """Hash an ordered list of texts together with the settings that produced their summary."""
+    digest = hashlib.sha256(config.encode("utf-8"))
+    for text in texts:
+        digest.update(text_hash(text).encode("ascii"))
+    return digest.hexdigest()
+
+
+class SummaryCache:
+    def __init__(self, path="summary_cache.sqlite", config=""):
+        """
+        Initialize the SummaryCache backed by a local SQLite file.
+
+        Args:
+            path (str): SQLite database file (default: summary_cache.sqlite).
+            config (str): Summarization settings; entries written under other
+                settings are never returned (default: "").
+        """
+        self.path = path
+        self.config = config
+        self.hits = 0
+        self.misses = 0
+
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS post_summaries (
+                post_hash TEXT PRIMARY KEY,
+                summary TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS document_summaries (
+                input_hash TEXT PRIMARY KEY,
+                concatenated_summary TEXT NOT NULL,
+                final_summary TEXT NOT NULL,
+                fields TEXT NOT NULL
+            );
+            """
+        )
+        self.connection.commit()
+
+    def document_key(self, texts):
+        """Key of an instance from its ordered input texts."""
+        return inputs_hash(texts, self.config)
+
+    def get_post(self, text):
+        """Return the cached intermediate summary of a post, or None on a miss."""
+        row = self.connection.execute(
+            "SELECT summary FROM post_summaries WHERE post_hash=?",
+            (inputs_hash([text], self.config),),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put_posts(self, texts, summaries):
+        """Store intermediate summaries of many posts."""
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO post_summaries VALUES (?, ?)",
+            [
+                (inputs_hash([text], self.config), summary)
+                for text, summary in zip(texts, summaries)
+            ],
+        )
+        self.connection.commit()
+
+    def get_document(self, key):
+        """
+        Return the cached summary of an instance, or None on a miss.
+
+        Returns:
+            tuple: (concatenated_summary, final_summary, fields).
+        """
+        row = self.connection.execute(
+            "SELECT concatenated_summary, final_summary, fields FROM document_summaries WHERE input_hash=?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0], row[1], json.loads(row[2])
+
+    def put_document(self, key, concatenated_summary, final_summary, fields):
+        """Store the summaries of an instance and the document fields derived from them (metrics)."""
+        self.connection.execute(
+            "INSERT OR REPLACE INTO document_summaries VALUES (?, ?, ?, ?)",
+            (key, concatenated_summary, final_summary, json.dumps(fields)),
+        )
+        self.connection.commit()
+
+    def stats(self):
+        """Return hit/miss counters and the hit rate."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def close(self):
+        """Close the SQLite connection."""
+        self.connection.close()
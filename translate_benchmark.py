@@ -0,0 +1,100 @@
+import random
+import threading
+import time
+
+import numpy as np
+
+from libretranslateClient import LibreTranslateClient
+from libretranslateStub import LibreTranslateStub
+
+# Benchmark settings
+NUM_POSTS = 500
+LANGUAGES = ["de", "fr", "es", "ja", "pt", "it"]
+CONCURRENCY_LEVELS = [1, 2, 4, 8, 16]
+BATCH_SIZES = [1, 16]
+
+# Stand-in server settings
+SERVER_LATENCY_PER_CHAR = 0.0001
+SERVER_BASE_LATENCY = 0.005
+SERVER_MAX_CONCURRENCY = 4
+SERVER_ERROR_RATE = 0.01
+
+
+class TimedLibreTranslateClient(LibreTranslateClient):
+    """LibreTranslateClient that records the latency of every request it sends."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies = []
+        self.latencies_lock = threading.Lock()
+
+    def _post(self, texts, source, target):
+        start = time.perf_counter()
+        result = super()._post(texts, source, target)
+        elapsed = time.perf_counter() - start
+        with self.latencies_lock:
+            self.latencies.append(elapsed)
+        return result
+
+
+def generate_posts(num_posts, seed=0):
+    rng = random.Random(seed)
+    words = ["lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing", "elit"]
+    return [
+        (" ".join(rng.choices(words, k=rng.randint(10, 200))), rng.choice(LANGUAGES))
+        for _ in range(num_posts)
+    ]
+
+
+def run_benchmark(url, posts, batch_size, max_workers):
+    client = TimedLibreTranslateClient(
+        url=url, batch_size=batch_size, max_workers=max_workers
+    )
+    try:
+        start = time.perf_counter()
+        results = client.translate_with_round_trip(posts)
+        elapsed = time.perf_counter() - start
+    finally:
+        client.close()
+
+    latencies = np.array(client.latencies) * 1000
+    errors = sum(1 for result in results if result["status"] != "SUCCESS")
+    return {
+        "posts_per_sec": len(posts) / elapsed,
+        "requests": len(latencies),
+        "p50_ms": np.percentile(latencies, 50),
+        "p95_ms": np.percentile(latencies, 95),
+        "p99_ms": np.percentile(latencies, 99),
+        "errors": errors,
+    }
+
+
+def main():
+    stub = LibreTranslateStub(
+        latency_per_char=SERVER_LATENCY_PER_CHAR,
+        base_latency=SERVER_BASE_LATENCY,
+        max_concurrency=SERVER_MAX_CONCURRENCY,
+        error_rate=SERVER_ERROR_RATE,
+        seed=0,
+    )
+    stub.start()
+
+    posts = generate_posts(NUM_POSTS)
+    print(
+        f"{'batch':>5} {'workers':>7} {'posts/s':>9} {'requests':>8} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}"
+    )
+    try:
+        for batch_size in BATCH_SIZES:
+            for max_workers in CONCURRENCY_LEVELS:
+                r = run_benchmark(stub.url, posts, batch_size, max_workers)
+                print(
+                    f"{batch_size:>5} {max_workers:>7} {r['posts_per_sec']:>9.1f} {r['requests']:>8} "
+                    f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['errors']:>6}"
+                )
+    finally:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
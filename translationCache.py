@@ -0,0 +1,96 @@
+import hashlib
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+def text_hash(text):
+    """Hash a text after collapsing whitespace, so trivially different copies share a key."""
+    normalized = re.sub(r"\s+", " ", text).strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    def __init__(self, path="translation_cache.sqlite", memory_size=10000):
+        """
+        Initialize the TranslationCache backed by a local SQLite file.
+
+        Args:
+            path (str): SQLite database file (default: translation_cache.sqlite).
+            memory_size (int): Number of entries kept in the in-memory LRU tier (default: 10000).
+        """
+        self.path = path
+        self.memory_size = memory_size
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS translations (
+                source TEXT NOT NULL,
+                target TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                PRIMARY KEY (source, target, text_hash)
+            )
+            """
+        )
+        self.connection.commit()
+
+    def _remember(self, key, translation):
+        self.memory[key] = translation
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def get(self, text, source, target):
+        """Return the cached translation of `text`, or None on a miss."""
+        key = (source, target, text_hash(text))
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return self.memory[key]
+
+            row = self.connection.execute(
+                "SELECT translation FROM translations WHERE source=? AND target=? AND text_hash=?",
+                key,
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._remember(key, row[0])
+            self.hits += 1
+            return row[0]
+
+    def put_many(self, texts, translations, source, target):
+        """Store a batch of successful translations for one language pair."""
+        rows = [
+            (source, target, text_hash(text), translation)
+            for text, translation in zip(texts, translations)
+        ]
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?)", rows
+            )
+            self.connection.commit()
+            for row in rows:
+                self._remember(row[:3], row[3])
+
+    def stats(self):
+        """Return hit/miss counters and the hit rate."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def close(self):
+        """Close the SQLite connection."""
+        self.connection.close()